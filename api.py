@@ -1,26 +1,60 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks, File, UploadFile, Form
+from fastapi import FastAPI, HTTPException, File, UploadFile, Form, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from contextlib import asynccontextmanager
 from pydantic import BaseModel
 import pandas as pd
-import math, uuid, asyncio
+import uuid, asyncio, json, base64
 import os
 import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-from logic import extract_author_id, load_or_fetch_author, evaluate_author_data_headless
-from database import update_publication_venues, init_db
+import logic
+from logic import (
+    extract_author_id, parse_author_ref, load_or_fetch_author,
+    evaluate_author_data_headless, evaluate_authors_batch
+)
+from database import init_db, run_migrations, get_quality_version
+from quality_data import get_snapshot, refresh_in_background
+from jobs import analysis_executor, single_flight, job_events, QueueFull
+from job_store import create_job_store
+from serialization import FastJSONResponse, EncodedCache, frame_to_records, dumps
+
+job_store = create_job_store()
+
+# encoded bodies of finished jobs (they never change), so repeat reads skip encoding
+encoded_results = EncodedCache(max_bytes=int(os.getenv("ENCODED_CACHE_BYTES", str(64 * 1024 * 1024))))
 
-job_status_store = {}
+# a stream re-reads the job store if nothing was pushed for this long (job on another worker)
+STREAM_POLL_SECONDS = float(os.getenv("STREAM_POLL_SECONDS", "2"))
+
+# /analyze/batch: authors per request, and profiles fetched at the same time within a batch
+BATCH_MAX_AUTHORS = int(os.getenv("BATCH_MAX_AUTHORS", "500"))
+BATCH_FETCH_WORKERS = int(os.getenv("BATCH_FETCH_WORKERS", "4"))
+
+def report_warm_up(future):
+    # nobody awaits the warm-up, so a failure would otherwise vanish (the first request retries)
+    if not future.cancelled() and future.exception() is not None:
+        print(f"Warning: Could not warm up quality data: {future.exception()}")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("Checking database tables...")
     init_db()
+    run_migrations()
     print("Database ready.")
+
+    # warm the quality snapshot off the event loop; requests never wait on it unless they need it
+    warm_up = asyncio.get_running_loop().run_in_executor(None, get_snapshot)
+    warm_up.add_done_callback(report_warm_up)
     
     yield  # app runs here
     
     print("Shutting down...")
+    analysis_executor.shutdown()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -33,28 +67,36 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# compress JSON responses (paper pages, results); SSE streams are left alone by starlette
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+
 # --- DATA MODELS ---
 class AnalyzeRequest(BaseModel):
     url: str
     is_cs_ai: bool = True
     forceRefresh: bool = False
 
+class BatchAnalyzeRequest(BaseModel):
+    authors: list[str]  # Scholar profile URLs or author ids
+    is_cs_ai: bool = True
+    forceRefresh: bool = False
+
 # --- HELPER ---
-def clean_nans(value):
-    """ Recursively replaces NaN/Inf with None for JSON safety. """
-    if isinstance(value, float):
-        if math.isnan(value) or math.isinf(value):
-            return None
-    if isinstance(value, dict):
-        return {k: clean_nans(v) for k, v in value.items()}
-    if isinstance(value, list):
-        return [clean_nans(v) for v in value]
-    return value
+def resolve_job(job_id):
+    """ Status entry for job_id, following coalesced jobs to the job doing the work. """
+    status = job_store.get(job_id)
+    if status and "follows" in status:
+        return status["follows"], job_store.get(status["follows"])
+    return job_id, status
 
 def update_job_progress(job_id, progress):
-    """ Updates the global variable so the frontend can see it. """
-    if job_id in job_status_store:
-        job_status_store[job_id]["progress"] = progress
+    """ Updates the job store so the frontend can see it, and pushes it to streams. """
+    job_store.update(job_id, progress=progress)
+    job_events.publish(job_id, {"status": "pending", "progress": progress})
+
+def finish_job(job_id, status, papers=None):
+    job_store.set(job_id, status, papers=papers)
+    job_events.publish(job_id, status)
 
 def run_analysis_task(job_id: str, url: str, force_refresh: bool, is_cs_ai: bool):
     try:
@@ -84,16 +126,17 @@ def run_analysis_task(job_id: str, url: str, force_refresh: bool, is_cs_ai: bool
         if not data or not data.get("publications"):
             raise ValueError("No publications found for this researcher.")
 
-        # 3. Analysis (logic)
-        metrics, df = evaluate_author_data_headless(data, is_cs_ai, progress_callback=progress_callback)
+        # 3. Analysis (logic) - CPU heavy, runs in the analysis process pool
+        progress_callback(60)
+        if analysis_executor.process_count > 0:
+            metrics, df = analysis_executor.run_cpu(evaluate_author_data_headless, data, is_cs_ai)
+        else:
+            metrics, df = evaluate_author_data_headless(data, is_cs_ai, progress_callback=progress_callback)
         
-        # 4. Update Database
+        # 4. Database already updated (once) inside evaluate_author_data_headless
         progress_callback(95) 
-        update_publication_venues(metrics["id"], df)
 
-        # 5. Prepare Final Response
-        df_clean = df.where(pd.notnull(df), None)
-        
+        # 5. Prepare Final Response (NaN/Inf -> None column-wise; numpy scalars are encoded as-is)
         raw_response = {
             "status": "success",
             "profile": {
@@ -104,46 +147,354 @@ def run_analysis_task(job_id: str, url: str, force_refresh: bool, is_cs_ai: bool
                 "last_updated": data.get("last_scraped")
             },
             "metrics": metrics,
-            "papers": df_clean.to_dict(orient="records")
+            "paper_count": len(df)
         }
 
-        # 6. Complete
-        job_status_store[job_id] = {
+        # 6. Complete (papers are served page by page from /analyze/papers)
+        finish_job(job_id, {
             "status": "completed",
             "progress": 100,
-            "result": clean_nans(raw_response)
-        }
+            "result": raw_response
+        }, papers=frame_to_records(df))
 
     except Exception as e:
         print(f"Job {job_id} Failed: {e}")
-        job_status_store[job_id] = {
+        finish_job(job_id, {
             "status": "failed",
             "progress": 100,
             "error": str(e)
-        }
+        })
+
+def run_batch_analysis_task(job_id: str, author_ids: list, force_refresh: bool, is_cs_ai: bool):
+    """
+    One job for many authors: profiles are fetched a few at a time, then every author is
+    evaluated in one pass (venues deduplicated across authors, one quality snapshot).
+    The status carries per-author progress under "authors".
+    """
+    authors = {aid: {"status": "pending", "progress": 0} for aid in author_ids}
+    lock = threading.Lock()
+
+    def publish(progress, **fields):
+        with lock:
+            for aid, changes in fields.items():
+                authors[aid] = {**authors[aid], **changes}
+            current = {aid: dict(a) for aid, a in authors.items()}
+        job_store.update(job_id, progress=progress, authors=current)
+        job_events.publish(job_id, {"status": "pending", "progress": progress, "authors": current})
+
+    def fetch(aid):
+        try:
+            data = load_or_fetch_author(
+                aid,
+                force_refresh=force_refresh,
+                progress_callback=lambda pct: publish(fetch_progress(), **{aid: {"status": "fetching", "progress": pct}})
+            )
+            if not data or not data.get("publications"):
+                raise ValueError("No publications found for this researcher.")
+            publish(fetch_progress(1), **{aid: {"status": "fetched", "progress": 60}})
+            return data
+        except Exception as e:
+            print(f"Batch {job_id}: {aid} failed: {e}")
+            publish(fetch_progress(1), **{aid: {"status": "failed", "progress": 100, "error": str(e)}})
+            return None
+
+    def fetch_progress(extra=0):
+        # 5..60 across the fetch phase, by authors done
+        with lock:
+            done = sum(a["status"] in ("fetched", "failed") for a in authors.values()) + extra
+        return 5 + int(55 * min(done, len(authors)) / len(authors))
+
+    try:
+        publish(5)
+        with ThreadPoolExecutor(max_workers=BATCH_FETCH_WORKERS, thread_name_prefix="batch-fetch") as pool:
+            fetched = [(aid, data) for aid, data in zip(author_ids, pool.map(fetch, author_ids)) if data]
+        if not fetched:
+            raise ValueError("No publications found for any of the researchers.")
+
+        # one matching pass for everyone - CPU heavy, runs in the analysis process pool
+        publish(60)
+        datas = [data for _, data in fetched]
+        if analysis_executor.process_count > 0:
+            results = analysis_executor.run_cpu(evaluate_authors_batch, datas, is_cs_ai)
+        else:
+            results = evaluate_authors_batch(datas, is_cs_ai, progress_callback=lambda pct: publish(60 + int(pct * 0.35)))
+
+        # combined table: one row per author, papers of everyone tagged with their author
+        summary = []
+        frames = []
+        for (aid, _), (metrics, df, error) in zip(fetched, results):
+            if error is not None:
+                print(f"Batch {job_id}: {aid} failed: {error}")
+                authors[aid] = {"status": "failed", "progress": 100, "error": error}
+                continue
+            summary.append(metrics)
+            frames.append(df.assign(author_id=aid, author_name=metrics["name"]))
+            authors[aid] = {"status": "completed", "progress": 100}
+        if not frames:
+            raise ValueError("None of the researchers could be evaluated.")
+        papers = pd.concat(frames, ignore_index=True)
+
+        finish_job(job_id, {
+            "status": "completed",
+            "progress": 100,
+            "authors": authors,
+            "result": {
+                "status": "success",
+                "kind": "batch",
+                "authors": summary,
+                "failed": [
+                    {"id": aid, "error": a.get("error")} for aid, a in authors.items() if a["status"] == "failed"
+                ],
+                "paper_count": len(papers)
+            }
+        }, papers=frame_to_records(papers))
+
+    except Exception as e:
+        print(f"Batch {job_id} Failed: {e}")
+        finish_job(job_id, {
+            "status": "failed",
+            "progress": 100,
+            "authors": authors,
+            "error": str(e)
+        })
+
+def fail_cancelled_job(job_id: str, key=None):
+    """ A queued job dropped at shutdown: fail it so pollers stop waiting, free its key. """
+    try:
+        finish_job(job_id, {"status": "failed", "progress": 100, "error": "Server shut down before the analysis started."})
+    except Exception as e:
+        print(f"Warning: Could not fail cancelled job {job_id}: {e}")
+    finally:
+        if key is not None:
+            single_flight.done(key, job_id)
+
+def run_coalesced_analysis_task(key, job_id: str, url: str, force_refresh: bool, is_cs_ai: bool):
+    try:
+        run_analysis_task(job_id, url, force_refresh, is_cs_ai)
+    finally:
+        single_flight.done(key, job_id)
 
 # --- ENDPOINTS ---
+# sync endpoints: with the "db" job store these hit the database, so they run in the threadpool
 @app.post("/analyze/start")
-async def start_analysis(request: AnalyzeRequest, background_tasks: BackgroundTasks):
+def start_analysis(request: AnalyzeRequest):
     job_id = str(uuid.uuid4())
-    job_status_store[job_id] = {"status": "pending", "progress": 0}
-
-    background_tasks.add_task(
-        run_analysis_task, 
-        job_id, 
-        request.url, 
-        request.forceRefresh, 
-        request.is_cs_ai
-    )
 
-    return {"job_id": job_id}
+    # single-flight: the same author with the same options is only computed once at a time
+    key = (extract_author_id(request.url) or request.url, request.is_cs_ai, request.forceRefresh)
+    leader = single_flight.join(key, job_id)
+    if leader is not None:
+        job_store.set(job_id, {"status": "pending", "progress": 0, "follows": leader})
+        return {"job_id": job_id, "queue_position": analysis_executor.queue_position(leader), "coalesced_with": leader}
+
+    job_store.set(job_id, {"status": "pending", "progress": 0})
+
+    try:
+        position = analysis_executor.submit(
+            job_id,
+            run_coalesced_analysis_task,
+            key,
+            job_id, 
+            request.url, 
+            request.forceRefresh, 
+            request.is_cs_ai,
+            on_cancel=lambda: fail_cancelled_job(job_id, key)
+        )
+    except QueueFull as e:
+        single_flight.done(key, job_id)
+        job_store.delete(job_id)
+        return queue_full_response(e)
+
+    return {"job_id": job_id, "queue_position": position}
+
+@app.post("/analyze/batch")
+def start_batch_analysis(request: BatchAnalyzeRequest):
+    """
+    Analyzes many Scholar profiles (e.g. a department) as one job; poll /analyze/status
+    (per-author progress under "authors") and page through /analyze/papers?author=...
+    """
+    author_ids = list(dict.fromkeys(aid for aid in map(parse_author_ref, request.authors) if aid))
+    invalid = [ref for ref in request.authors if not parse_author_ref(ref)]
+    if not author_ids:
+        raise HTTPException(status_code=400, detail="No valid Google Scholar URLs or author ids.")
+    if len(author_ids) > BATCH_MAX_AUTHORS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_AUTHORS} authors per batch.")
+
+    job_id = str(uuid.uuid4())
+    job_store.set(job_id, {
+        "status": "pending",
+        "progress": 0,
+        "authors": {aid: {"status": "pending", "progress": 0} for aid in author_ids}
+    })
+
+    try:
+        position = analysis_executor.submit(
+            job_id,
+            run_batch_analysis_task,
+            job_id,
+            author_ids,
+            request.forceRefresh,
+            request.is_cs_ai,
+            on_cancel=lambda: fail_cancelled_job(job_id)
+        )
+    except QueueFull as e:
+        job_store.delete(job_id)
+        return queue_full_response(e)
+
+    return {"job_id": job_id, "queue_position": position, "authors": author_ids, "invalid": invalid}
+
+def queue_full_response(e: QueueFull):
+    # admission control: tell the client to come back instead of piling up work
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many analyses queued, try again shortly.", "queued": e.args[0]},
+        headers={"Retry-After": "30"}
+    )
 
 @app.get("/analyze/status/{job_id}")
-async def get_status(job_id: str):
-    status = job_status_store.get(job_id)
+def get_status(job_id: str):
+    body = encoded_results.get(("status", job_id))
+    if body is not None:
+        return FastJSONResponse(body)
+
+    target, status = resolve_job(job_id)
     if not status:
         return {"status": "not_found"}
-    return status
+    if status["status"] == "pending":
+        return FastJSONResponse({**status, "queue_position": analysis_executor.queue_position(target)})
+
+    body = dumps(status)
+    encoded_results.put(("status", job_id), body)
+    return FastJSONResponse(body)
+
+def sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {dumps(data).decode()}\n\n"
+
+@app.get("/analyze/stream/{job_id}")
+async def stream_status(job_id: str):
+    """
+    Server-Sent Events version of /analyze/status: "progress" events while the job runs,
+    then a single "completed" / "failed" (or "not_found") event with the full status.
+    """
+    async def events():
+        target, status = await run_in_threadpool(resolve_job, job_id)
+        if not status:
+            yield sse("not_found", {"status": "not_found"})
+            return
+
+        # subscribe before re-reading, so nothing published in between is lost
+        queue = job_events.subscribe(target)
+        try:
+            status = await run_in_threadpool(job_store.get, target) or status
+            last_progress = None
+            while True:
+                if status["status"] in ("completed", "failed"):
+                    yield sse(status["status"], status)
+                    return
+
+                if status.get("progress") != last_progress:
+                    last_progress = status.get("progress")
+                    yield sse("progress", {
+                        "status": status["status"],
+                        "progress": last_progress,
+                        "queue_position": analysis_executor.queue_position(target),
+                        **({"authors": status["authors"]} if "authors" in status else {})
+                    })
+
+                try:
+                    status = await asyncio.wait_for(queue.get(), timeout=STREAM_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    # nothing pushed: the job may be running on another worker
+                    status = await run_in_threadpool(job_store.get, target)
+                    if not status:
+                        yield sse("not_found", {"status": "not_found"})
+                        return
+        finally:
+            job_events.unsubscribe(target, queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# sortable paper fields for /analyze/papers
+PAPER_SORT_FIELDS = {"year", "citations", "title", "venue", "rank", "role", "match_score", "author_name"}
+
+def encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"o": offset}).encode()).decode()
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        return int(json.loads(base64.urlsafe_b64decode(cursor.encode()))["o"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+@app.get("/analyze/papers/{job_id}")
+def get_papers(
+    job_id: str,
+    cursor: str = None,
+    limit: int = Query(100, ge=1, le=1000),
+    sort: str = "year",
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    year_from: int = None,
+    year_to: int = None,
+    rank: str = None,
+    role: str = None,
+    author: str = None
+):
+    """
+    Papers of a completed job, filtered (year range, comma separated rank / role / author
+    id lists - author for batch jobs), sorted server-side and paginated with an opaque cursor.
+    """
+    if sort not in PAPER_SORT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {sorted(PAPER_SORT_FIELDS)}")
+
+    key = ("papers", job_id, cursor, limit, sort, order, year_from, year_to, rank, role, author)
+    body = encoded_results.get(key)
+    if body is not None:
+        return FastJSONResponse(body)
+
+    job_id, status = resolve_job(job_id)
+    papers = job_store.get_papers(job_id) if status else None
+    if papers is None:
+        return {"status": status["status"] if status else "not_found", "papers": [], "next_cursor": None}
+
+    ranks = {r.strip() for r in rank.split(",")} if rank else None
+    roles = {r.strip() for r in role.split(",")} if role else None
+    author_ids = {a.strip() for a in author.split(",")} if author else None
+    selected = [
+        p for p in papers
+        if (year_from is None or (p.get("year") is not None and p["year"] >= year_from))
+        and (year_to is None or (p.get("year") is not None and p["year"] <= year_to))
+        and (ranks is None or p.get("rank") in ranks)
+        and (roles is None or p.get("role") in roles)
+        and (author_ids is None or p.get("author_id") in author_ids)
+    ]
+
+    # missing values always sort last; sort is stable so equal keys keep the stored order
+    present = [p for p in selected if p.get(sort) is not None]
+    missing = [p for p in selected if p.get(sort) is None]
+    present.sort(key=lambda p: (str(p[sort]).lower() if isinstance(p[sort], str) else p[sort]), reverse=(order == "desc"))
+    selected = present + missing
+
+    offset = decode_cursor(cursor) if cursor else 0
+    page = selected[offset:offset + limit]
+    next_offset = offset + len(page)
+
+    body = dumps({
+        "status": status["status"],
+        "total": len(selected),
+        "papers": page,
+        "next_cursor": encode_cursor(next_offset) if next_offset < len(selected) else None
+    })
+    # papers only exist once the job is finished, so the page can be reused as-is
+    encoded_results.put(key, body)
+    return FastJSONResponse(body)
+
+@app.get("/analyze/queue")
+async def queue_stats():
+    return {**analysis_executor.stats(), **single_flight.stats()}
 
 @app.post("/upload-quality-list")
 async def upload_quality_list(
@@ -167,6 +518,11 @@ async def upload_quality_list(
         from database import update_quality_list_in_db  # Import inside function to avoid circular imports
         
         rows_written = update_quality_list_in_db(df, list_type, mode)
+
+        # rebuild the quality snapshot in the background; analyses already running finish
+        # on the old one, and the new version keeps stale cached matches from being served
+        quality_version = get_quality_version()
+        refresh_in_background()
         
         # Cleanup
         os.remove(temp_filename)
@@ -175,6 +531,7 @@ async def upload_quality_list(
             "ok": True,
             "table": list_type,
             "rows_written": rows_written,
+            "quality_version": quality_version,
         }
 
     except Exception as e:
@@ -182,6 +539,13 @@ async def upload_quality_list(
             os.remove(f"temp_{file.filename}")
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
+@app.get("/cache/stats")
+def cache_stats():
+    return {
+        "quality_version": get_snapshot().version,
+        "match_cache": logic.match_cache.stats()
+    }
+
 @app.get("/")
 def home():
     return {"message": "ComPARE API is running."}
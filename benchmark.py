@@ -0,0 +1,355 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import subprocess
+import tracemalloc
+from contextlib import contextmanager, redirect_stdout
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# the benchmark installs its own quality snapshot; never swap in the DB one mid-run
+os.environ.setdefault("QUALITY_VERSION_CHECK_SECONDS", "inf")
+
+import pandas as pd
+from sqlalchemy import text
+
+import logic
+import quality_data
+import fetchProfile
+import fake_serpapi
+from database import engine, init_db, run_migrations, count_round_trips
+from venue_matcher import VenueMatcher, normalize_text
+from serialization import frame_to_records, dumps
+
+# End-to-end benchmark of the analysis pipeline (what run_analysis_task does) against a
+# fake SerpAPI client and synthetic quality lists:
+#   python benchmark.py --output bench.json            (needs DATABASE_URL, use a scratch DB)
+#   python benchmark.py --no-db --sizes 50,500         (matching / metrics only, DB calls skipped)
+#   python benchmark.py --compare old.json new.json
+# Researchers are stored as "bench-<n>" and removed afterwards, and venue matches are
+# cached under BENCH_QUALITY_VERSION, so real data is never touched.
+
+BENCH_QUALITY_VERSION = -1
+DEFAULT_SIZES = [50, 500, 5000]
+
+WORDS = """
+adaptive algebraic applied artificial autonomous bayesian biomedical cloud cognitive
+combinatorial communication complex computational computer control cryptographic data
+decision deep digital discrete distributed dynamic educational electronic embedded energy
+engineering evolutionary experimental financial formal fuzzy genetic geometric graph
+human hybrid image industrial information integrated intelligent interactive knowledge
+language learning logic machine management mathematical medical mobile modeling molecular
+multimedia natural network neural numerical optical optimization parallel pattern physical
+probabilistic quantum random real-time reasoning recognition reliable robotic scientific
+secure semantic sensor signal simulation social software spatial speech statistical
+stochastic structural symbolic systems theoretical ubiquitous vision visual wireless
+""".split()
+
+JOURNAL_PATTERNS = [
+    "Journal of {a} {b}", "International Journal of {a} and {b}", "{a} {b} Letters",
+    "IEEE Transactions on {a} {b}", "Annals of {a} {b}", "{a} {b} Review",
+    "Advances in {a} {b}", "ACM Transactions on {a} {b}", "{a} and {b} {c}",
+]
+CONFERENCE_PATTERNS = [
+    "International Conference on {a} {b}", "Symposium on {a} {b} and {c}",
+    "European Conference on {a} {b}", "Workshop on {a} {b}", "Annual Meeting on {a} {b}",
+]
+
+def synthetic_titles(rng, patterns, count):
+    titles = set()
+    while len(titles) < count:
+        a, b, c = (w.title() for w in rng.sample(WORDS, 3))
+        titles.add(rng.choice(patterns).format(a=a, b=b, c=c))
+    return sorted(titles)
+
+def synthetic_quality_lists(journal_count: int, conference_count: int, seed: int = 7):
+    """ Journal / conference frames shaped like the *_quality tables. """
+    rng = random.Random(seed)
+    journals = pd.DataFrame({"Title": synthetic_titles(rng, JOURNAL_PATTERNS, journal_count)})
+    journals["rank"] = [rng.choice(["Q1", "Q2", "Q3", "Q4"]) for _ in range(len(journals))]
+
+    conferences = pd.DataFrame({"Title": synthetic_titles(rng, CONFERENCE_PATTERNS, conference_count)})
+    conferences["acronym"] = [
+        "".join(w[0] for w in t.split() if w[0].isupper()) + str(i) for i, t in enumerate(conferences["Title"])
+    ]
+    conferences["rank"] = [rng.choice(["A*", "A", "B", "C"]) for _ in range(len(conferences))]
+
+    for df in (journals, conferences):
+        df["Title_norm"] = df["Title"].apply(normalize_text)
+    return journals, conferences
+
+class FakeSerpClient:
+    """
+    In-process stand-in for fetchProfile.client (same search(**params) interface), built
+    on fake_serpapi. Venues are drawn from the synthetic quality lists with the noise
+    Scholar adds (volume / pages, acronyms) plus some unknown venues.
+    """
+
+    def __init__(self, journals, conferences, latency: float = 0.0):
+        self.journals = list(journals["Title"])
+        self.conferences = list(conferences["Title"])
+        self.acronyms = list(conferences["acronym"])
+        self.latency = latency
+        self.calls = 0
+
+    def venue(self, rng):
+        roll = rng.random()
+        if roll < 0.45:
+            return f"{rng.choice(self.journals)} {rng.randint(1, 60)} ({rng.randint(1, 12)}), {rng.randint(1, 900)}-{rng.randint(901, 999)}"
+        if roll < 0.70:
+            return f"Proceedings of the {rng.choice(self.conferences)}, {rng.randint(1, 500)}"
+        if roll < 0.80:
+            return f"{rng.choice(self.acronyms)} {rng.randint(2005, 2024)}"
+        if roll < 0.90:
+            return f"arXiv preprint arXiv:{rng.randint(1000, 2499)}.{rng.randint(10000, 99999)}"
+        return f"Unlisted {rng.choice(WORDS).title()} {rng.choice(WORDS).title()} Forum"
+
+    def search(self, **params):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        result = fake_serpapi.search(params, default_papers=0, inexact=False)
+        for article in result["articles"]:
+            article["publication"] = self.venue(random.Random(article["title"]))
+        return result
+
+# --- MEASUREMENT ---
+class Stages:
+    """
+    Per-stage wall time, traced peak memory (tracemalloc) and DB round trips. Stages
+    nest (e.g. match_venues_cached inside evaluate_author_data_headless); a parent's
+    peak includes its children's.
+    tracemalloc does not see native allocations (e.g. rapidfuzz's cdist matrices), so the
+    process high-water mark (max_rss_mb, never goes down) is recorded after each stage too.
+    """
+
+    def __init__(self):
+        self.results = {}
+        self.stack = []
+        self.top_level = []  # stage names not nested in another stage, in first-run order
+
+    @contextmanager
+    def stage(self, name: str):
+        if not self.stack and name not in self.top_level:
+            self.top_level.append(name)
+        if self.stack:
+            parent = self.stack[-1]
+            parent["peak"] = max(parent["peak"], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        frame = {"start_mem": tracemalloc.get_traced_memory()[0], "peak": 0}
+        self.stack.append(frame)
+
+        start = time.perf_counter()
+        with count_round_trips() as trips:
+            try:
+                yield
+            finally:
+                seconds = time.perf_counter() - start
+                self.stack.pop()
+                frame["peak"] = max(frame["peak"], tracemalloc.get_traced_memory()[1])
+                if self.stack:
+                    self.stack[-1]["peak"] = max(self.stack[-1]["peak"], frame["peak"])
+
+                entry = self.results.setdefault(name, {"seconds": 0.0, "peak_mb": 0.0, "round_trips": 0, "calls": 0})
+                entry["seconds"] = round(entry["seconds"] + seconds, 4)
+                entry["peak_mb"] = round(max(entry["peak_mb"], (frame["peak"] - frame["start_mem"]) / 2**20), 2)
+                entry["round_trips"] += trips.count
+                entry["calls"] += 1
+                if resource is not None:
+                    entry["max_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+    def instrument(self, module, name: str):
+        """ Replaces module.name with a wrapper that records every call as a stage. """
+        fn = getattr(module, name)
+
+        def wrapper(*args, **kwargs):
+            with self.stage(name):
+                return fn(*args, **kwargs)
+
+        setattr(module, name, wrapper)
+        return fn
+
+# --- RUN ---
+def install_snapshot(journals, conferences):
+    snapshot = quality_data.QualitySnapshot(
+        version=BENCH_QUALITY_VERSION,
+        matcher=VenueMatcher.from_frames(journals, conferences),
+        loaded_at=time.time(),
+        source="benchmark"
+    )
+    quality_data._swap(snapshot)
+    return snapshot
+
+def cleanup(use_db: bool):
+    logic.match_cache.clear()
+    if not use_db:
+        return
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM researchers WHERE id LIKE 'bench-%'"))
+        conn.execute(text("DELETE FROM venue_matches WHERE quality_version = :v"), {"v": BENCH_QUALITY_VERSION})
+
+def run_size(size: int, stages: Stages, use_db: bool, is_cs_ai: bool):
+    author_id = f"bench-{size}"
+    if use_db:
+        # the path run_analysis_task takes: scrape + store + reload
+        with stages.stage("load_or_fetch_author"):
+            data = logic.load_or_fetch_author(author_id, force_refresh=True)
+    else:
+        data = logic.get_scholar_profile(author_id)  # instrumented, recorded as its own stage
+
+    # cold: empty in-process LRU and no stored matches for the benchmark version
+    with stages.stage("evaluate_cold"):
+        metrics, df = logic.evaluate_author_data_headless(data, is_cs_ai)
+
+    # warm: same venues again, now answered by the caches
+    with stages.stage("evaluate_warm"):
+        logic.evaluate_author_data_headless(data, is_cs_ai)
+
+    with stages.stage("serialize"):
+        body = dumps({"metrics": metrics, "papers": frame_to_records(df)})
+
+    if use_db:
+        # an unchanged re-scrape should write (almost) nothing
+        with stages.stage("save_unchanged"):
+            logic.save_author_profile(fetchProfile.get_scholar_profile(author_id))
+
+    return {"papers": len(df), "response_bytes": len(body)}
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def run(sizes, journal_count, conference_count, latency, use_db, is_cs_ai, trace_memory=True):
+    # tracemalloc slows Python-heavy stages down a lot; --no-memory for cleaner timings
+    if trace_memory:
+        tracemalloc.start()
+    setup = Stages()
+
+    with setup.stage("quality_lists"):
+        journals, conferences = synthetic_quality_lists(journal_count, conference_count)
+    with setup.stage("build_snapshot"):
+        install_snapshot(journals, conferences)
+
+    fake = FakeSerpClient(journals, conferences, latency=latency)
+    original_client, fetchProfile.client = fetchProfile.client, fake
+
+    db_functions = {}
+    if use_db:
+        init_db()
+        run_migrations()
+    else:
+        for name, noop in [("load_venue_matches", lambda norms, version: {}),
+                           ("save_venue_matches", lambda matches, version: None),
+                           ("update_publication_venues", lambda author_id, df: 0),
+                           ("top_keywords", lambda author_id, df, top_n=5: logic.extract_top_keywords(df, top_n))]:
+            db_functions[name] = getattr(logic, name)
+            setattr(logic, name, noop)
+
+    results = []
+    try:
+        for size in sizes:
+            cleanup(use_db)
+            stages = Stages()
+            originals = {
+                name: stages.instrument(logic, name)
+                for name in ["get_scholar_profile", "save_author_profile", "load_author_profile",
+                             "match_venues_cached", "update_publication_venues"]
+            }
+            calls_before = fake.calls
+            try:
+                info = run_size(size, stages, use_db, is_cs_ai)
+            finally:
+                for name, fn in originals.items():
+                    setattr(logic, name, fn)
+            info["serpapi_calls"] = fake.calls - calls_before
+            results.append({"size": size, **info, "stages": stages.results})
+            summary = ", ".join(f"{name} {stages.results[name]['seconds']:.2f}s" for name in stages.top_level)
+            print(f"--> [BENCH] {size} papers: {summary}", file=sys.stderr)
+    finally:
+        fetchProfile.client = original_client
+        for name, fn in db_functions.items():
+            setattr(logic, name, fn)
+        cleanup(use_db)
+        tracemalloc.stop()
+
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "config": {
+            "sizes": sizes,
+            "journals": journal_count,
+            "conferences": conference_count,
+            "latency": latency,
+            "db": use_db,
+            "is_cs_ai": is_cs_ai,
+            "trace_memory": trace_memory
+        },
+        "setup": setup.results,
+        "results": results
+    }
+
+def compare(old_path: str, new_path: str):
+    """ Prints seconds / peak memory / round trips per stage, old -> new. """
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+
+    print(f"{old.get('commit', '?')[:10]} -> {new.get('commit', '?')[:10]}")
+    old_by_size = {r["size"]: r for r in old["results"]}
+    for result in new["results"]:
+        before = old_by_size.get(result["size"])
+        if before is None:
+            continue
+        print(f"\n{result['size']} papers")
+        for name, now in result["stages"].items():
+            was = before["stages"].get(name)
+            if was is None:
+                continue
+            ratio = now["seconds"] / was["seconds"] if was["seconds"] else float("nan")
+            print(
+                f"  {name:<28} {was['seconds']:>9.3f}s -> {now['seconds']:>9.3f}s ({ratio:5.2f}x)"
+                f"  {was['peak_mb']:>8.1f} -> {now['peak_mb']:>8.1f} MB"
+                f"  {was['round_trips']:>6} -> {now['round_trips']:>6} trips"
+            )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="End-to-end analysis pipeline benchmark.")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="papers per synthetic researcher")
+    parser.add_argument("--journals", type=int, default=30000)
+    parser.add_argument("--conferences", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per fake SerpAPI call")
+    parser.add_argument("--no-db", action="store_true", help="skip the stages that need the database")
+    parser.add_argument("--no-memory", action="store_true", help="don't trace memory (peak_mb is 0)")
+    parser.add_argument("--general", action="store_true", help="run as a non CS/AI researcher")
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two reports")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        sys.exit(0)
+
+    # the pipeline's own logging goes to stderr, stdout is only the report
+    with redirect_stdout(sys.stderr):
+        report = run(
+            [int(s) for s in args.sizes.split(",")],
+            args.journals, args.conferences, args.latency,
+            use_db=not args.no_db, is_cs_ai=not args.general, trace_memory=not args.no_memory
+        )
+    payload = dumps(report).decode()
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload)
+    else:
+        print(payload)
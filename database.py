@@ -1,13 +1,22 @@
 import os
-from sqlalchemy import create_engine, Table, Column, Integer, Float, String, Text, ForeignKey, MetaData, DateTime, text
+import io
+from sqlalchemy import (
+    create_engine, Table, Column, Integer, Float, String, Text, ForeignKey, MetaData, DateTime, text, select,
+    event, values, column, cast, or_
+)
 from sqlalchemy.dialects.postgresql import JSONB, insert
 from dotenv import load_dotenv
 from datetime import datetime, timezone
+from contextlib import contextmanager
+import threading
+import collections
 import pandas as pd
 import re
 import string
 import numpy as np
 
+from keywords import count_terms
+
 load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
 
@@ -17,6 +26,30 @@ if DATABASE_URL and DATABASE_URL.startswith("postgres://"):
 engine = create_engine(DATABASE_URL, pool_pre_ping=True, pool_recycle=1800)
 metadata = MetaData()
 
+# --- ROUND TRIP COUNTING ---
+# every statement sent to the DB by the current thread is added to the active counters
+_round_trip_local = threading.local()
+
+class RoundTripCounter:
+    def __init__(self):
+        self.count = 0
+
+@contextmanager
+def count_round_trips():
+    counters = _round_trip_local.__dict__.setdefault("counters", [])
+    counter = RoundTripCounter()
+    counters.append(counter)
+    try:
+        yield counter
+    finally:
+        counters.remove(counter)
+
+@event.listens_for(engine, "before_cursor_execute")
+def _count_round_trip(conn, cursor, statement, parameters, context, executemany):
+    for counter in getattr(_round_trip_local, "counters", ()):
+        # a plain executemany is still one round trip per parameter set
+        counter.count += len(parameters) if executemany else 1
+
 # TABLES
 researchers = Table(
     "researchers", metadata,
@@ -25,7 +58,9 @@ researchers = Table(
     Column("affiliations", Text),
     Column("metrics", JSONB),
     Column("co_authors", JSONB),
-    Column("last_scraped", DateTime(timezone=True)) 
+    Column("last_scraped", DateTime(timezone=True)),
+    Column("last_full_scrape", DateTime(timezone=True)),  # last refresh that re-read every page
+    Column("keywords_indexed_at", DateTime(timezone=True))  # researcher_keywords built (may be empty)
 )
 
 publications = Table(
@@ -44,6 +79,14 @@ publications = Table(
     Column("source", String)
 )
 
+# title term counts per researcher, kept in step with publications by save_author_profile
+researcher_keywords = Table(
+    "researcher_keywords", metadata,
+    Column("researcher_id", String, ForeignKey("researchers.id", ondelete="CASCADE"), primary_key=True),
+    Column("term", String, primary_key=True, index=True),  # index: document frequency for TF-IDF
+    Column("count", Integer)
+)
+
 journals_quality = Table(
     "journals_quality", metadata,
     Column("id", Integer, primary_key=True, autoincrement=True),
@@ -62,53 +105,171 @@ conferences_quality = Table(
     Column("rank", String)
 )
 
+# bumped on every quality list upload; cached venue matches are only valid for one version
+quality_meta = Table(
+    "quality_meta", metadata,
+    Column("key", String, primary_key=True),
+    Column("value", Integer),
+    Column("updated_at", DateTime(timezone=True))
+)
+
+# cross-researcher cache of match_quality results, keyed on venue_key(venue): the raw
+# string without volume/page/year numbers; the match depends on more than the normalized
+# text (guesser keywords, acronym case)
+venue_matches = Table(
+    "venue_matches", metadata,
+    Column("venue", Text, primary_key=True),
+    Column("quality_version", Integer, primary_key=True),
+    Column("venue_type", String),
+    Column("matched_title", Text),
+    Column("rank", String),
+    Column("match_score", Float),
+    Column("source", String),
+    Column("matched_at", DateTime(timezone=True))
+)
+
+# job status shared by every API worker (job_store.SqlJobStore)
+analysis_jobs = Table(
+    "analysis_jobs", metadata,
+    Column("id", String, primary_key=True),
+    Column("status", JSONB),
+    Column("papers", JSONB),  # kept out of status so polls stay small
+    Column("expires_at", DateTime(timezone=True), index=True)
+)
+
+# applied migrations, one row per version
+schema_migrations = Table(
+    "schema_migrations", metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String),
+    Column("applied_at", DateTime(timezone=True))
+)
+
 def init_db():
     metadata.create_all(engine)
 
+# --- MIGRATIONS ---
+# create_all only creates missing tables, so changes to existing tables go here.
+# (version, name, statements); append only, never edit an applied migration.
+MIGRATIONS = [
+    (1, "publications: (researcher_id, title) unique + sort index", [
+        # the old delete+insert save deduplicated titles, but make sure before adding the constraint
+        """
+        DELETE FROM publications a USING publications b
+        WHERE a.researcher_id = b.researcher_id AND a.title = b.title AND a.id > b.id
+        """,
+        # load_author_profile, save_author_profile diff, update_publication_venues
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_publications_researcher_title ON publications (researcher_id, title)",
+        # load_author_profile: WHERE researcher_id = ? ORDER BY year DESC, citations DESC, title
+        """
+        CREATE INDEX IF NOT EXISTS ix_publications_researcher_year_citations
+        ON publications (researcher_id, year DESC NULLS LAST, citations DESC NULLS LAST, title)
+        """,
+    ]),
+    (2, "analysis_jobs: separate papers column", [
+        "ALTER TABLE analysis_jobs ADD COLUMN IF NOT EXISTS papers JSONB",
+    ]),
+    (3, "researchers: last_full_scrape for incremental refreshes", [
+        "ALTER TABLE researchers ADD COLUMN IF NOT EXISTS last_full_scrape TIMESTAMPTZ",
+        # every profile stored so far came from a full scrape
+        "UPDATE researchers SET last_full_scrape = last_scraped WHERE last_full_scrape IS NULL",
+    ]),
+    (4, "venue_matches: keyed on the raw venue", [
+        # rows keyed on venue_norm may hold another spelling's match; it is only a cache,
+        # so drop them (a table created by init_db already has the new column)
+        """
+        DO $$
+        BEGIN
+            IF EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_name = 'venue_matches' AND column_name = 'venue_norm'
+            ) THEN
+                DELETE FROM venue_matches;
+                ALTER TABLE venue_matches RENAME COLUMN venue_norm TO venue;
+            END IF;
+        END $$
+        """,
+    ]),
+    (5, "researchers: keywords_indexed_at marks a built keyword index", [
+        "ALTER TABLE researchers ADD COLUMN IF NOT EXISTS keywords_indexed_at TIMESTAMPTZ",
+        # researchers with terms were indexed; the rest are rebuilt (once) on first use
+        """
+        UPDATE researchers SET keywords_indexed_at = now()
+        WHERE keywords_indexed_at IS NULL AND id IN (SELECT DISTINCT researcher_id FROM researcher_keywords)
+        """,
+    ]),
+    (6, "venue_matches: keyed on venue_key()", [
+        # rows keyed on the raw venue were matched with its numbers in; only a cache
+        "DELETE FROM venue_matches",
+    ]),
+]
+
+# arbitrary key for pg_advisory_xact_lock, so concurrent workers migrate one at a time
+MIGRATION_LOCK_ID = 72_410_001
+
+def run_migrations():
+    """ Applies pending MIGRATIONS in order. Returns the list of versions applied. """
+    applied_now = []
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+        applied = set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+        for version, name, statements in MIGRATIONS:
+            if version in applied:
+                continue
+            for sql in statements:
+                conn.execute(text(sql))
+            conn.execute(schema_migrations.insert().values(
+                version=version, name=name, applied_at=datetime.now(timezone.utc)
+            ))
+            print(f"Applied migration {version}: {name}")
+            applied_now.append(version)
+
+    return applied_now
+
 def safe_int(value):
     if value in (None, "", " "): return None
     try: return int(value)
     except: return None
 
-def save_author_profile(profile: dict):
-    with engine.begin() as conn:
-        # 1. update researcher info 
-        stmt = insert(researchers).values(
-            id=profile["author_id"],
-            name=profile["name"],
-            affiliations=profile["affiliations"],
-            metrics=profile["metrics"],
-            co_authors=profile["co_authors"],
-            last_scraped=datetime.now(timezone.utc)
-        )
-        stmt = stmt.on_conflict_do_update(
-            index_elements=["id"],
-            set_={
-                "name": profile["name"],
-                "affiliations": profile["affiliations"],
-                "metrics": profile["metrics"],
-                "co_authors": profile["co_authors"],
-                "last_scraped": datetime.now(timezone.utc)
-            }
-        )
-        conn.execute(stmt)
+# publication columns that come from Scholar (anything else is computed by us)
+PUBLICATION_SCRAPED_FIELDS = ["authors", "venue", "year", "citations", "author_pos"]
 
-        # 2. delete old publications
-        conn.execute(publications.delete().where(publications.c.researcher_id == profile["author_id"]))
+def save_author_profile(profile: dict, prune: bool = True):
+    """
+    Upserts the researcher and diffs their publications against the stored ones:
+    new titles are inserted, rows whose scraped fields changed are updated and titles
+    that disappeared are deleted. Unchanged rows (and their match results) are untouched.
+    prune=False is for partial (incremental) scrapes: stored titles missing from the
+    profile are kept instead of deleted.
+    """
+    now = datetime.now(timezone.utc)
+    with count_round_trips() as trips, engine.begin() as conn:
+        # 1. update researcher info 
+        researcher = {
+            "name": profile["name"],
+            "affiliations": profile["affiliations"],
+            "metrics": profile["metrics"],
+            "co_authors": profile["co_authors"],
+            "last_scraped": now
+        }
+        if prune:
+            researcher["last_full_scrape"] = now
+        stmt = insert(researchers).values(id=profile["author_id"], **researcher)
+        stmt = stmt.on_conflict_do_update(index_elements=["id"], set_=researcher)
+        keywords_indexed = conn.execute(stmt.returning(researchers.c.keywords_indexed_at)).scalar() is not None
+
+        # 2. build the new publication rows
+        publication = {}  # title -> row (dict keeps the first occurrence = deduplication)
 
-        # 3. insert new publications 
-        publication = []
-        seen_titles = set()  # checklist to track titles added
-        
         for pub in profile["publications"]:
             title = pub.get("title")
             
             # deduplication check
-            if not title or title in seen_titles:
+            if not title or title in publication:
                 continue 
-            seen_titles.add(title)
             
-            publication.append({
+            publication[title] = {
                 "researcher_id": profile["author_id"],
                 "title": title,
                 "authors": pub.get("authors"),
@@ -116,10 +277,157 @@ def save_author_profile(profile: dict):
                 "year": safe_int(pub.get("year")), 
                 "citations": safe_int(pub.get("citations")) or 0,
                 "author_pos": pub.get("author_pos")
-            })
-            
-        if publication:
-            conn.execute(publications.insert(), publication)
+            }
+
+        # 3. diff against what is stored, keyed on (researcher_id, title)
+        stored = conn.execute(
+            select(
+                publications.c.id, publications.c.title,
+                *[publications.c[name] for name in PUBLICATION_SCRAPED_FIELDS]
+            ).where(publications.c.researcher_id == profile["author_id"])
+        ).fetchall()
+
+        existing = {}
+        to_delete = []
+        deleted_titles = []
+        for row in stored:
+            if row.title in publication and row.title not in existing:
+                existing[row.title] = row
+            elif prune or row.title in publication:
+                to_delete.append(row.id)  # disappeared (or a duplicate title)
+                if row.title not in publication:
+                    deleted_titles.append(row.title)
+
+        to_insert = [pub for title, pub in publication.items() if title not in existing]
+        to_update = []
+        venue_changed = []
+        for title, row in existing.items():
+            pub = publication[title]
+            if any(getattr(row, name) != pub[name] for name in PUBLICATION_SCRAPED_FIELDS):
+                to_update.append((row.id, *[pub[name] for name in PUBLICATION_SCRAPED_FIELDS]))
+            if row.venue != pub["venue"]:
+                venue_changed.append(row.id)
+
+        # 4. write only the difference; unchanged rows keep their venue match results
+        if to_delete:
+            conn.execute(publications.delete().where(publications.c.id.in_(to_delete)))
+
+        if to_insert:
+            conn.execute(publications.insert(), to_insert)
+
+        for start in range(0, len(to_update), VENUE_UPDATE_BATCH):
+            v = values(
+                column("id", Integer),
+                column("authors", Text),
+                column("venue", Text),
+                column("year", Integer),
+                column("citations", Integer),
+                column("author_pos", String),
+                name="v"
+            ).data(to_update[start:start + VENUE_UPDATE_BATCH])
+            conn.execute(
+                publications.update()
+                .where(publications.c.id == v.c.id)
+                .values(**{name: cast(v.c[name], publications.c[name].type) for name in PUBLICATION_SCRAPED_FIELDS})
+            )
+
+        # a new venue string needs a fresh match
+        if venue_changed:
+            conn.execute(
+                publications.update()
+                .where(publications.c.id.in_(venue_changed))
+                .values(venue_type=None, rank=None, match_score=None, source=None)
+            )
+
+        # 5. keyword counts: only added / removed titles change them
+        if keywords_indexed or not stored:
+            terms = count_terms(pub["title"] for pub in to_insert)
+            terms.subtract(count_terms(deleted_titles))
+        else:
+            # stored before the keyword index existed: count every title it now has
+            terms = count_terms(({row.title for row in stored} - set(deleted_titles)) | set(publication))
+        apply_keyword_counts(conn, profile["author_id"], terms)
+        if not keywords_indexed:
+            mark_keywords_indexed(conn, profile["author_id"], now)
+
+    print(
+        f"--> [DB] save_author_profile: +{len(to_insert)} ~{len(to_update)} -{len(to_delete)} "
+        f"publications in {trips.count} round trips"
+    )
+    return {"inserted": len(to_insert), "updated": len(to_update), "deleted": len(to_delete)}
+
+# terms per INSERT ... ON CONFLICT statement (3 bind parameters each, Postgres allows 65535)
+KEYWORD_UPSERT_BATCH = 5000
+
+def apply_keyword_counts(conn, author_id: str, delta: collections.Counter):
+    """ Adds delta (negative for removed titles) to the researcher's term counts. """
+    rows = [{"researcher_id": author_id, "term": term, "count": n} for term, n in delta.items() if n]
+    for start in range(0, len(rows), KEYWORD_UPSERT_BATCH):
+        stmt = insert(researcher_keywords).values(rows[start:start + KEYWORD_UPSERT_BATCH])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["researcher_id", "term"],
+            set_={"count": researcher_keywords.c.count + stmt.excluded.count}
+        )
+        conn.execute(stmt)
+    if any(n < 0 for n in delta.values()):
+        conn.execute(researcher_keywords.delete().where(
+            (researcher_keywords.c.researcher_id == author_id) & (researcher_keywords.c.count <= 0)
+        ))
+
+def mark_keywords_indexed(conn, author_id: str, when=None):
+    # a researcher whose titles give no terms has an empty index, not a missing one
+    conn.execute(
+        researchers.update().where(researchers.c.id == author_id)
+        .values(keywords_indexed_at=when or datetime.now(timezone.utc))
+    )
+
+def rebuild_researcher_keywords(author_id: str):
+    """ Recounts the researcher's terms from the stored titles (profiles saved before the index existed). """
+    with engine.begin() as conn:
+        titles = conn.execute(
+            select(publications.c.title).where(publications.c.researcher_id == author_id)
+        ).scalars().all()
+        conn.execute(researcher_keywords.delete().where(researcher_keywords.c.researcher_id == author_id))
+        apply_keyword_counts(conn, author_id, count_terms(titles))
+        mark_keywords_indexed(conn, author_id)
+
+def load_top_keywords(author_id: str, top_n: int = 5, weighting: str = "count"):
+    """
+    Top terms of a researcher from researcher_keywords, as [{"text", "count"}] (ties by term,
+    like keywords.top_terms). weighting="tfidf" ranks by count * idf over every stored
+    researcher instead (and adds "score"), so terms everyone uses ("neural", "network")
+    sink below distinctive ones. None if the researcher's index was never built.
+    """
+    with engine.begin() as conn:
+        indexed_at = conn.execute(
+            select(researchers.c.keywords_indexed_at).where(researchers.c.id == author_id)
+        ).scalar()
+        if indexed_at is None:
+            return None
+
+        if weighting == "tfidf":
+            rows = conn.execute(text("""
+                WITH total AS (SELECT COUNT(DISTINCT researcher_id) AS n FROM researcher_keywords),
+                docs AS (
+                    SELECT term, COUNT(*) AS df FROM researcher_keywords
+                    WHERE term IN (SELECT term FROM researcher_keywords WHERE researcher_id = :rid)
+                    GROUP BY term
+                )
+                SELECT k.term, k.count, k.count * (LN((1.0 + total.n) / (1.0 + docs.df)) + 1) AS score
+                FROM researcher_keywords k JOIN docs USING (term) CROSS JOIN total
+                WHERE k.researcher_id = :rid
+                ORDER BY score DESC, k.term
+                LIMIT :top_n
+            """), {"rid": author_id, "top_n": top_n}).fetchall()
+            return [{"text": r.term, "count": r.count, "score": round(float(r.score), 3)} for r in rows]
+
+        rows = conn.execute(
+            select(researcher_keywords.c.term, researcher_keywords.c.count)
+            .where(researcher_keywords.c.researcher_id == author_id)
+            .order_by(researcher_keywords.c.count.desc(), researcher_keywords.c.term)
+            .limit(top_n)
+        ).fetchall()
+        return [{"text": r.term, "count": r.count} for r in rows]
 
 def load_author_profile(author_id: str):
     with engine.begin() as conn:
@@ -132,8 +440,9 @@ def load_author_profile(author_id: str):
         profile["author_id"] = profile["id"]
 
         # if DB returns a naive datetime (no timezone), force it to UTC
-        if profile.get("last_scraped") and profile["last_scraped"].tzinfo is None:
-            profile["last_scraped"] = profile["last_scraped"].replace(tzinfo=timezone.utc)
+        for key in ("last_scraped", "last_full_scrape"):
+            if profile.get(key) and profile[key].tzinfo is None:
+                profile[key] = profile[key].replace(tzinfo=timezone.utc)
 
         # load publications
         # sort by year (newest), then citations (highest), then title (A-Z)
@@ -150,23 +459,265 @@ def load_author_profile(author_id: str):
 
         return profile
     
-def update_publication_venues(author_id: str, df):
-    with engine.begin() as conn:
-        for _, row in df.iterrows():
+# rows per UPDATE ... FROM (VALUES ...) statement
+VENUE_UPDATE_BATCH = 1000
 
-            conn.execute(
+def update_publication_venues(author_id: str, df):
+    """
+    Writes venue_type / rank / match_score / source back in bulk: one
+    UPDATE ... FROM (VALUES ...) per VENUE_UPDATE_BATCH rows, touching only rows whose
+    values actually changed. Returns the number of rows updated.
+    """
+    if df is None or df.empty:
+        return 0
+
+    cols = ["title", "venue_type", "rank", "match_score", "source"]
+    changes = df.reindex(columns=cols).drop_duplicates(subset="title")
+    changes = changes[changes["title"].notna()]
+    changes = changes.astype(object).where(changes.notna(), None)
+    rows = list(changes.itertuples(index=False, name=None))
+    if not rows:
+        return 0
+
+    updated = 0
+    with count_round_trips() as trips, engine.begin() as conn:
+        for start in range(0, len(rows), VENUE_UPDATE_BATCH):
+            v = values(
+                column("title", Text),
+                column("venue_type", String),
+                column("rank", String),
+                column("match_score", Float),
+                column("source", String),
+                name="v"
+            ).data(rows[start:start + VENUE_UPDATE_BATCH])
+
+            # casts keep all-NULL VALUES columns (typed as text by Postgres) assignable
+            new_values = {
+                "venue_type": cast(v.c.venue_type, String),
+                "rank": cast(v.c.rank, String),
+                "match_score": cast(v.c.match_score, Float),
+                "source": cast(v.c.source, String)
+            }
+            stmt = (
                 publications.update()
-                .where(
-                    (publications.c.researcher_id == author_id) &
-                    (publications.c.title == row["title"])
-                )
-                .values(
-                    venue_type=row.get("venue_type"),
-                    rank=row.get("rank"),
-                    match_score=row.get("match_score"),
-                    source=row.get("source")
-                )
+                .where(publications.c.researcher_id == author_id)
+                .where(publications.c.title == v.c.title)
+                .where(or_(*[publications.c[name].is_distinct_from(val) for name, val in new_values.items()]))
+                .values(**new_values)
+            )
+            updated += conn.execute(stmt).rowcount
+
+    print(f"--> [DB] update_publication_venues: {updated}/{len(rows)} rows changed in {trips.count} round trips")
+    return updated
+
+# --- venue match cache ---
+
+def get_quality_version(conn=None):
+    """ Current quality list version (0 if no list was ever uploaded through the API). """
+    query = select(quality_meta.c.value).where(quality_meta.c.key == "version")
+    if conn is None:
+        with engine.begin() as conn:
+            return conn.execute(query).scalar() or 0
+    return conn.execute(query).scalar() or 0
+
+def bump_quality_version(conn):
+    stmt = insert(quality_meta).values(key="version", value=1, updated_at=datetime.now(timezone.utc))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["key"],
+        set_={"value": quality_meta.c.value + 1, "updated_at": datetime.now(timezone.utc)}
+    ).returning(quality_meta.c.value)
+    return conn.execute(stmt).scalar()
+
+QUALITY_TABLES = {t.name: t for t in (journals_quality, conferences_quality)}
+
+def copy_rows(conn, table_name: str, frame):
+    """ Streams frame into table_name with a single COPY (NaN/None become NULL). """
+    buffer = io.StringIO()
+    frame.to_csv(buffer, index=False, header=False, na_rep="\\N")
+    buffer.seek(0)
+    columns = ", ".join(f'"{c}"' for c in frame.columns)
+    # raw psycopg2 cursor on the same connection, so the COPY is part of conn's transaction
+    with conn.connection.cursor() as cursor:
+        cursor.copy_expert(f"COPY {table_name} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer)
+
+# pg_advisory_xact_lock(QUALITY_SWAP_LOCK_ID, hashtext(table)): one replace per table at a time
+QUALITY_SWAP_LOCK_ID = 72_410_002
+
+def relation_names(conn, relation: str):
+    """
+    Names Postgres actually gave a table's id sequence, primary key and other indexes
+    (by column tuple), read from the catalog; None if the table does not exist.
+    """
+    if conn.execute(text("SELECT to_regclass(:rel)"), {"rel": relation}).scalar() is None:
+        return None
+
+    has_id = conn.execute(text("""
+        SELECT 1 FROM pg_attribute
+        WHERE attrelid = CAST(:rel AS regclass) AND attname = 'id' AND NOT attisdropped
+    """), {"rel": relation}).scalar()
+    sequence = None
+    if has_id:
+        sequence = conn.execute(text("""
+            SELECT c.relname FROM pg_class c
+            WHERE c.oid = CAST(pg_get_serial_sequence(:rel, 'id') AS regclass)
+        """), {"rel": relation}).scalar()
+
+    rows = conn.execute(text("""
+        SELECT i.relname AS name, x.indisprimary AS is_primary,
+               array_agg(CAST(a.attname AS text) ORDER BY k.ord) AS columns
+        FROM pg_index x
+        JOIN pg_class i ON i.oid = x.indexrelid
+        CROSS JOIN LATERAL unnest(CAST(x.indkey AS int2[])) WITH ORDINALITY AS k(attnum, ord)
+        JOIN pg_attribute a ON a.attrelid = x.indrelid AND a.attnum = k.attnum
+        WHERE x.indrelid = CAST(:rel AS regclass)
+        GROUP BY i.relname, x.indisprimary
+    """), {"rel": relation}).fetchall()
+
+    return {
+        "sequence": sequence,
+        "pkey": next((r.name for r in rows if r.is_primary), None),
+        "indexes": {tuple(r.columns): r.name for r in rows if not r.is_primary}
+    }
+
+def replace_quality_table(conn, table: Table, frame):
+    """
+    Replaces the contents of a quality table without ever exposing an empty one:
+    the rows are COPYed into a staging copy of the table (same columns and indexes,
+    own id sequence), which is then swapped in by rename. Everything runs in conn's
+    transaction, so readers see the old list until commit and the new one after;
+    only the swap itself takes the exclusive lock.
+    """
+    # concurrent uploads of the same list wait here instead of fighting over the staging table
+    conn.execute(text("SELECT pg_advisory_xact_lock(:id, hashtext(:table))"), {"id": QUALITY_SWAP_LOCK_ID, "table": table.name})
+
+    staging_name = f"{table.name}_staging"
+    staging = table.to_metadata(MetaData(), name=staging_name)
+    staging.drop(conn, checkfirst=True)  # left over from an upload that died mid-way
+    staging.create(conn)
+    copy_rows(conn, staging_name, frame)
+    conn.execute(text(f"ANALYZE {staging_name}"))
+
+    # keep the live table's names; a legacy table created by to_sql(if_exists="replace")
+    # has no sequence or indexes, so those get the names init_db would have used
+    live = relation_names(conn, table.name) or {"sequence": None, "pkey": None, "indexes": {}}
+    staged = relation_names(conn, staging_name)
+    default_indexes = {tuple(c.name for c in ix.columns): ix.name for ix in table.indexes}
+
+    # the swap
+    conn.execute(text(f"DROP TABLE IF EXISTS {table.name}"))
+    conn.execute(text(f"ALTER TABLE {staging_name} RENAME TO {table.name}"))
+
+    if staged["sequence"]:
+        target = live["sequence"] or f"{table.name}_id_seq"
+        conn.execute(text(f'ALTER SEQUENCE "{staged["sequence"]}" RENAME TO "{target}"'))
+    if staged["pkey"]:
+        target = live["pkey"] or f"{table.name}_pkey"
+        conn.execute(text(f'ALTER TABLE {table.name} RENAME CONSTRAINT "{staged["pkey"]}" TO "{target}"'))
+    for columns, name in staged["indexes"].items():
+        target = live["indexes"].get(columns) or default_indexes.get(columns)
+        if target and target != name:
+            conn.execute(text(f'ALTER INDEX "{name}" RENAME TO "{target}"'))
+
+def load_venue_matches(venues, quality_version: int):
+    """ Returns {venue: (match_type, matched_title, rank, match_score, source)} for known venues. """
+    venues = list(venues)
+    if not venues:
+        return {}
+
+    with engine.begin() as conn:
+        rows = conn.execute(
+            venue_matches.select().where(
+                (venue_matches.c.quality_version == quality_version) &
+                (venue_matches.c.venue.in_(venues))
             )
+        ).fetchall()
+
+    return {
+        r.venue: (r.venue_type, r.matched_title, r.rank, r.match_score, r.source)
+        for r in rows
+    }
+
+def save_venue_matches(matches: dict, quality_version: int):
+    """ matches: {venue: (match_type, matched_title, rank, match_score, source)} """
+    if not matches:
+        return
+
+    now = datetime.now(timezone.utc)
+    rows = [
+        {
+            "venue": venue,
+            "quality_version": quality_version,
+            "venue_type": m[0],
+            "matched_title": m[1],
+            "rank": m[2],
+            "match_score": m[3],
+            "source": m[4],
+            "matched_at": now
+        }
+        for venue, m in matches.items()
+    ]
+    with engine.begin() as conn:
+        conn.execute(insert(venue_matches).on_conflict_do_nothing(), rows)
+
+# --- QUALITY LIST RANK COLUMNS ---
+# headers that never hold a rank, and headers that do
+RANK_BAD_KEYWORDS = ["code", "id", "link", "url", "h5", "index", "metric", "comment", "issn", "isbn", "name", "title", "acronym", "citescore",
+                     "sjr", "snip", "categories", "publisher", "type", "open access"]
+RANK_KEYWORDS = ["core", "icore", "era", "rank", "quartile"]
+# cell values that mean "no rank here"
+EMPTY_RANK_VALUES = ["", "-", "nan", "None", "0", "0.0", "N/A", "Unranked"]
+
+def rank_column_priority(columns):
+    """
+    Rank columns of a quality sheet, best first: the newest year in the header wins,
+    quartile (+200) and CORE/ICORE (+100) columns beat ERA ones of the same year and
+    ties keep the sheet's column order. Depends on the headers only.
+    """
+    candidates = []
+    for col in columns:
+        c_lower = str(col).lower()
+        if any(bad in c_lower for bad in RANK_BAD_KEYWORDS):
+            continue
+
+        if any(k in c_lower for k in RANK_KEYWORDS):
+            # extract year (default to 0 if missing)
+            years = re.findall(r'\d{4}', str(col))
+            year = int(years[0]) if years else 0
+
+            # prefer CORE/ICORE over ERA if years are equal
+            if "quartile" in c_lower:
+                bonus = 200
+            elif "core" in c_lower or "icore" in c_lower:
+                bonus = 100
+            else:
+                bonus = 0
+
+            candidates.append((year + bonus, col))
+
+    # stable: equal scores stay in column order
+    candidates.sort(key=lambda x: x[0], reverse=True)
+    return [col for _, col in candidates]
+
+def resolve_latest_rank(df, default):
+    """
+    Per row, the first non-empty value among the rank columns in priority order
+    (rank_column_priority), stripped; default when there is none. Works column by
+    column over the whole sheet instead of re-ranking the headers for every row.
+    """
+    rank = np.full(len(df), default, dtype=object)
+    unresolved = np.ones(len(df), dtype=bool)
+
+    for col in rank_column_priority(df.columns):
+        values = df[col]
+        text_values = values.astype(str).str.strip().to_numpy(dtype=object)
+        valid = values.notna().to_numpy() & ~np.isin(text_values, EMPTY_RANK_VALUES)
+        take = unresolved & valid
+        rank[take] = text_values[take]
+        unresolved &= ~take
+        if not unresolved.any():
+            break
+
+    return pd.Series(rank, index=df.index)
 
 # --- uploadButton addition ---
 
@@ -190,32 +741,6 @@ def update_quality_list_in_db(df, list_type, mode="replace"):
         s = s.translate(str.maketrans("", "", string.punctuation))
         return re.sub(r"\s+", " ", s).strip()
 
-    def get_latest_rank_dynamic(row):
-        valid_cols = [c for c in row.index if pd.notna(row[c]) and str(row[c]).strip() not in ["", "-", "nan", "None", "0", "0.0", "N/A", "Unranked"]]
-        candidates = []
-
-        for col in valid_cols:
-            c_lower = col.lower()
-            bad_keywords = ["code", "id", "link", "url", "h5", "index", "metric", "comment", "issn", "isbn", "name", "title", "acronym", "citescore",
-                            "sjr", "snip", "categories", "publisher", "type", "open access"]
-            if any(bad in c_lower for bad in bad_keywords):
-                continue
-
-            if any(k in c_lower for k in ["core", "icore", "era", "rank", "quartile"]):
-                years = re.findall(r'\d{4}', col)
-                year = int(years[0]) if years else 0
-                
-                if "quartile" in c_lower: bonus = 200
-                elif "core" in c_lower or "icore" in c_lower: bonus = 100
-                else: bonus = 0
-
-                candidates.append((year + bonus, col, row[col]))
-
-        candidates.sort(key=lambda x: x[0], reverse=True)
-        if candidates: 
-            return str(candidates[0][2]).strip()
-        return "Unknown"
-
     # --- PREPARE DATA ---
 
     # Clean empty strings
@@ -249,7 +774,7 @@ def update_quality_list_in_db(df, list_type, mode="replace"):
         final_df = pd.DataFrame({
             "Title": title_col,
             "Title_norm": title_col.apply(normalize_text),
-            "rank": df.apply(get_latest_rank_dynamic, axis=1),
+            "rank": resolve_latest_rank(df, "Unknown"),
             "issn": issn_col
         })
 
@@ -280,7 +805,7 @@ def update_quality_list_in_db(df, list_type, mode="replace"):
             "Title": title_col,
             "Title_norm": title_col.apply(normalize_text),
             "acronym": acronym_col.astype(str).str.lower().replace("nan", ""),
-            "rank": df.apply(get_latest_rank_dynamic, axis=1)
+            "rank": resolve_latest_rank(df, "Unknown")
         })
 
     # Filter out invalid rows (where Title didn't exist or normalized to empty)
@@ -294,8 +819,11 @@ def update_quality_list_in_db(df, list_type, mode="replace"):
 
     with engine.begin() as conn:
         if mode == "replace":
-            conn.execute(text(f"DELETE FROM {target_table}"))
-        
-        final_df.to_sql(target_table, conn, if_exists="append", index=False)
+            replace_quality_table(conn, QUALITY_TABLES[target_table], final_df)
+        else:
+            copy_rows(conn, target_table, final_df)
+
+        # invalidates every cached venue match
+        bump_quality_version(conn)
         
     return len(final_df)
\ No newline at end of file
@@ -0,0 +1,72 @@
+import sys
+from sqlalchemy import text
+from database import engine, init_db, run_migrations
+
+# the publications hot paths (see load_author_profile, save_author_profile, update_publication_venues)
+QUERIES = {
+    "load_author_profile": """
+        SELECT * FROM publications
+        WHERE researcher_id = :rid
+        ORDER BY year DESC NULLS LAST, citations DESC NULLS LAST, title ASC
+    """,
+    "save_author_profile (diff)": """
+        SELECT id, title, authors, venue, year, citations, author_pos FROM publications
+        WHERE researcher_id = :rid
+    """,
+    "update_publication_venues": """
+        UPDATE publications SET rank = rank
+        WHERE researcher_id = :rid AND title = :title
+    """,
+}
+
+# indexes added by migration 1 (dropped with --from-scratch to show the "before" plans)
+MIGRATION_INDEXES = ["uq_publications_researcher_title", "ix_publications_researcher_year_citations"]
+
+def pick_researcher(conn):
+    """ The researcher with the most publications (most interesting plan). """
+    row = conn.execute(text("""
+        SELECT researcher_id, MIN(title) AS title FROM publications
+        GROUP BY researcher_id ORDER BY COUNT(*) DESC LIMIT 1
+    """)).fetchone()
+    return (row.researcher_id, row.title) if row else (None, None)
+
+def explain_all(label, author_id=None):
+    print(f"\n===== {label} =====")
+    # EXPLAIN ANALYZE really runs the UPDATE, so everything is rolled back
+    with engine.connect() as conn:
+        trans = conn.begin()
+        try:
+            rid, title = pick_researcher(conn)
+            rid = author_id or rid
+            if rid is None:
+                print("No publications stored yet.")
+                return
+            for name, sql in QUERIES.items():
+                print(f"\n--- {name} (researcher_id={rid}) ---")
+                plan = conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"), {"rid": rid, "title": title})
+                for line in plan:
+                    print(line[0])
+        finally:
+            trans.rollback()
+
+def drop_migration_indexes():
+    with engine.begin() as conn:
+        for name in MIGRATION_INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        conn.execute(text("DELETE FROM schema_migrations WHERE version = 1"))
+
+def run(author_id=None, from_scratch=False):
+    init_db()
+    if from_scratch:
+        print("Dropping migration 1 indexes to show the plans without them...")
+        drop_migration_indexes()
+
+    explain_all("BEFORE migrations", author_id)
+    applied = run_migrations()
+    print(f"\nApplied migrations: {applied or 'none (already up to date)'}")
+    explain_all("AFTER migrations", author_id)
+
+if __name__ == "__main__":
+    # usage: python explain_queries.py [author_id] [--from-scratch]
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    run(args[0] if args else None, from_scratch="--from-scratch" in sys.argv)
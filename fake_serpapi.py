@@ -0,0 +1,151 @@
+import json
+import time
+import random
+import argparse
+import threading
+from functools import lru_cache
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Local stand-in for the SerpAPI google_scholar_author engine, for development without
+# spending API credits:
+#   python fake_serpapi.py --port 8765 --latency 0.3
+#   SERPAPI_BASE_URL=http://127.0.0.1:8765 uvicorn api:app
+# Author ids ending in "-<n>" (e.g. "fake-500") have n papers; any other id gets
+# --papers papers. Articles are deterministic per author id.
+
+VENUES = [
+    "Advances in Neural Information Processing Systems",
+    "Proceedings of the AAAI Conference on Artificial Intelligence",
+    "IEEE Transactions on Pattern Analysis and Machine Intelligence",
+    "Journal of Machine Learning Research",
+    "International Conference on Machine Learning",
+    "Proceedings of the IEEE/CVF Conference on Computer Vision and Pattern Recognition (CVPR)",
+    "Nature Communications",
+    "arXiv preprint arXiv:2101.00001",
+    "Information Sciences",
+    "Workshop on Something Obscure 2019",
+]
+COAUTHORS = ["A Smith", "B Jones", "C Garcia", "D Chen", "E Müller", "F Rossi", "G Tanaka", "H Kim"]
+
+def author_name(author_id: str) -> str:
+    return f"Jane {author_id.replace('-', ' ').title()} Doe"
+
+def paper_count(author_id: str, default: int) -> int:
+    suffix = author_id.rsplit("-", 1)[-1]
+    return int(suffix) if "-" in author_id and suffix.isdigit() else default
+
+@lru_cache(maxsize=32)
+def make_articles(author_id: str, count: int):
+    """ The author's articles, newest first (what sort=pubdate returns). """
+    rng = random.Random(author_id)
+    name = author_name(author_id)
+    short_name = f"J {name.split()[-1]}"
+    articles = []
+    for i in range(count):
+        coauthors = rng.sample(COAUTHORS, rng.randint(0, 4))
+        coauthors.insert(rng.randint(0, len(coauthors)), short_name)
+        articles.append({
+            "title": f"Paper {i} on topic {rng.randint(0, 50)} by {author_id}",
+            "authors": ", ".join(coauthors) + (", ..." if rng.random() < 0.1 else ""),
+            "publication": f"{rng.choice(VENUES)}, {rng.randint(1, 40)}",
+            "year": str(2024 - i * 30 // max(count, 1)),
+            "cited_by": {"value": int(rng.paretovariate(1.2)) - 1}
+        })
+    return articles
+
+def search(params: dict, default_papers: int, inexact: bool, total_offset: int = 0):
+    author_id = params.get("author_id", "unknown")
+    start = int(params.get("start", 0))
+    num = int(params.get("num", 20))
+    articles = make_articles(author_id, paper_count(author_id, default_papers))
+    if params.get("sort") != "pubdate":
+        articles = sorted(articles, key=lambda a: -a["cited_by"]["value"])
+    page = [dict(a) for a in articles[start:start + num]]  # callers may edit what they get
+
+    result = {
+        "search_metadata": {"status": "Success"},
+        "author": {"name": author_name(author_id), "affiliations": "Fake University"},
+        "cited_by": {"table": [{"citations": {"all": sum(a["cited_by"]["value"] for a in articles)}}]},
+        "co_authors": [{"name": n} for n in COAUTHORS[:3]],
+        "articles": page,
+    }
+    if start == 0:
+        # Scholar's count is an estimate; --inexact makes it a bit off like the real one
+        total = len(articles) + total_offset + (random.randint(-30, 30) if inexact else 0)
+        result["search_information"] = {"total_results": max(total, 0)}
+    if start + num < len(articles):
+        result["serpapi_pagination"] = {"next": f"/search.json?start={start + num}"}
+    return result
+
+class Handler(BaseHTTPRequestHandler):
+    options = None  # argparse namespace, set in main()
+    lock = threading.Lock()
+    request_count = 0
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        with self.lock:
+            Handler.request_count += 1
+
+        time.sleep(self.options.latency)
+        if url.path != "/search.json":
+            return self.send_json(404, {"error": "Not found"})
+        if random.random() < self.options.failure_rate:
+            return self.send_json(503, {"error": "Simulated failure"})
+        if random.random() < self.options.rate_limit:
+            return self.send_json(429, {"error": "Simulated rate limit"}, {"Retry-After": str(self.options.retry_after)})
+        self.send_json(200, search(params, self.options.papers, self.options.inexact, self.options.total_offset))
+
+    def send_json(self, status: int, body: dict, headers=None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        if self.options.verbose:
+            super().log_message(format, *args)
+
+def serve(port: int = 8765, papers: int = 300, latency: float = 0.0, failure_rate: float = 0.0, inexact: bool = False,
+          verbose: bool = False, rate_limit: float = 0.0, retry_after: float = 1.0, total_offset: int = 0):
+    """
+    Starts the server on a background thread and returns it (call .shutdown() when done).
+    port=0 picks a free port (server.server_port).
+    """
+    Handler.options = argparse.Namespace(
+        papers=papers, latency=latency, failure_rate=failure_rate, inexact=inexact, verbose=verbose,
+        rate_limit=rate_limit, retry_after=retry_after, total_offset=total_offset
+    )
+    Handler.request_count = 0
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake SerpAPI google_scholar_author server.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--papers", type=int, default=300, help="papers for ids not ending in -<n>")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with a 429")
+    parser.add_argument("--inexact", action="store_true", help="report an approximate total_results")
+    parser.add_argument("--total-offset", type=int, default=0, help="added to total_results (an over/underestimate)")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    server = serve(
+        args.port, args.papers, args.latency, args.failure_rate, args.inexact, args.verbose,
+        args.rate_limit, args.retry_after, args.total_offset
+    )
+    print(f"Fake SerpAPI listening on http://127.0.0.1:{args.port} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -1,135 +1,278 @@
 import os
-import serpapi
+import math
+import time
+import random
+import httpx
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from dotenv import load_dotenv
-from name_variations import name_variations
+from name_variations import AuthorMatcher
 
 load_dotenv()
 api_key = os.getenv('SERPAPI_KEY')
-client = serpapi.Client(api_key=api_key)
 
-# HELPER
-def get_author_pos(authors: str, title: str, variations: list) -> str:
-    # track people found in og authors list
-    # might need to add this number to 'title' count later
-    authors_list_count = 0
-    
-    if authors:
-        clean_str = authors.replace("...", "")
-        indiv_authors = [p.strip().lower() for p in clean_str.split(",") if p.strip()]
-        
-        authors_list_count = len(indiv_authors)
-        
-        for i, person in enumerate(indiv_authors):
-            if any(v in person for v in variations):
-                return str(i + 1) # found in default place directly
+# point at a local fake server (see fake_serpapi.py) for development
+SERPAPI_BASE_URL = os.getenv("SERPAPI_BASE_URL", "https://serpapi.com")
+# pages fetched at the same time once the first page tells us how many there are
+SERPAPI_PARALLELISM = int(os.getenv("SERPAPI_PARALLELISM", "4"))
+SERPAPI_RETRIES = int(os.getenv("SERPAPI_RETRIES", "3"))
+# longest Retry-After we are willing to sleep for before retrying a 429
+SERPAPI_MAX_RETRY_AFTER = float(os.getenv("SERPAPI_MAX_RETRY_AFTER", "60"))
+PAGE_SIZE = 100
 
-    # check title (for publications that list authors in title)
-    if title:
-        title = title.lower()
-        
-        for v in variations:
-            if v in title:
-                # found in title
-                match_index = title.find(v)
-                text_before = title[:match_index]
-                commas_in_title = text_before.count(",")
-                
-                final_pos = authors_list_count + commas_in_title + 1
-                
-                return str(final_pos)
-
-    # fallback (hidden behind "...")
-    if authors and "..." in authors:
-        return f"{authors_list_count}+" 
-        
-    return "-"
+class SerpApiClient:
+    """
+    Minimal SerpAPI client on a pooled httpx.Client (keep-alive connections shared by
+    every thread). Timeouts, connection errors, 429 and 5xx answers are retried with
+    exponential backoff (or after the server's Retry-After, when it sends one);
+    anything else is raised right away.
+    """
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+    def __init__(self, api_key, base_url=SERPAPI_BASE_URL, retries=SERPAPI_RETRIES, backoff=0.5, timeout=60.0, max_connections=16):
+        self.api_key = api_key
+        self.retries = retries
+        self.backoff = backoff
+        self.http = httpx.Client(
+            base_url=base_url,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        )
+
+    def search(self, **params):
+        params = {**params, "api_key": self.api_key}
+        for attempt in range(self.retries + 1):
+            response = None
+            try:
+                response = self.http.get("/search.json", params=params)
+                response.raise_for_status()
+                return response.json()
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code not in self.RETRY_STATUSES or attempt == self.retries:
+                    raise
+            except httpx.TransportError:
+                if attempt == self.retries:
+                    raise
+            time.sleep(self.retry_delay(attempt, response))
+
+    def retry_delay(self, attempt: int, response=None) -> float:
+        """ Seconds to wait before the next attempt: Retry-After if given, else backoff. """
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                try:
+                    delay = (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds()
+                except (TypeError, ValueError):
+                    delay = None
+            if delay is not None:
+                return min(max(delay, 0.0), SERPAPI_MAX_RETRY_AFTER)
+        # 0.5s, 1s, 2s, ... with jitter so parallel page fetches don't retry in lockstep
+        return self.backoff * 2 ** attempt * (1 + random.random() / 2)
+
+    def close(self):
+        self.http.close()
+
+client = SerpApiClient(api_key=api_key)
+
+def fetch_page(serp_client, author_id: str, start: int, sort: str = None):
+    params = {"sort": sort} if sort else {}
+    return serp_client.search(
+        engine="google_scholar_author",
+        author_id=author_id,
+        hl="en",
+        start=start,
+        num=PAGE_SIZE,
+        **params
+    )
+
+def has_next_page(result) -> bool:
+    return "serpapi_pagination" in result and "next" in result["serpapi_pagination"]
+
+def is_last_page(result) -> bool:
+    return len(result.get("articles", [])) < PAGE_SIZE or not has_next_page(result)
 
-def get_scholar_profile(author_id: str, max_pages: int = 50, progress_callback=None):
+def profile_from_first_page(author_id: str, result):
+    """ The profile skeleton filled from the first result page, and the author's matcher. """
+    author_name = result["author"].get("name")
+    matcher = AuthorMatcher.from_name(author_name)
     profile = {
         "author_id": author_id,
-        "name": None,
-        "variations": [],
-        "affiliations": None,
-        "metrics": None,
-        "co_authors": [],
+        "name": author_name,
+        "variations": matcher.variations,
+        "affiliations": result["author"].get("affiliations"),
+        "metrics": result["cited_by"]["table"],
+        "co_authors": [co["name"] for co in result.get("co_authors", [])],
         "publications": []
     }
+    return profile, matcher
 
-    start = 0
-    page_size = 100
+def parse_articles(articles, matcher: AuthorMatcher):
+    publications = []
+    for article in articles:
+        title = article.get("title", "")
+        authors = article.get("authors", "")
+        pos = matcher.author_pos(authors, title)
+
+        publications.append({
+            "title": title,
+            "authors": authors,
+            "venue": article.get("publication"),
+            "year": article.get("year"),
+            "citations": article.get("cited_by", {}).get("value", 0),
+            "author_pos": pos
+        })
+    return publications
+
+def report_progress(progress_callback, articles_found, total_papers):
+    if not progress_callback:
+        return
+    base = 15
+    # If we don't know the total, assume 200. If we passed 200, assume +100 more.
+    estimated_total = total_papers if total_papers else 200 
+    if articles_found > estimated_total: estimated_total = articles_found + 100
+    
+    fraction = articles_found / estimated_total
+    if fraction > 1: fraction = 1
+    
+    real_progress = base + int(fraction * 40)
+    progress_callback(min(real_progress, 55))
+
+def prefetch_pages(serp_client, author_id: str, total_papers: int, max_pages: int, parallelism: int, progress_callback=None):
+    """
+    Fetches pages 2..N (N from total_results, capped at max_pages), at most `parallelism`
+    at a time, and returns {start: result}. Pages are reassembled in order by the caller.
+    total_results is only an estimate, so nothing past the first short or last page is
+    scheduled: an overestimate costs at most parallelism - 1 extra calls.
+    """
+    starts = iter(page * PAGE_SIZE for page in range(1, min(max_pages, math.ceil(total_papers / PAGE_SIZE))))
+    pages = {}
+    end = math.inf  # start of the last page, once one has been seen
+
+    with ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix="serpapi") as pool:
+        in_flight = {}
+
+        def schedule():
+            while len(in_flight) < parallelism:
+                start = next(starts, None)
+                if start is None or start > end:
+                    return
+                in_flight[pool.submit(fetch_page, serp_client, author_id, start)] = start
+
+        schedule()
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                start = in_flight.pop(future)
+                pages[start] = future.result()
+                if is_last_page(pages[start]):
+                    end = min(end, start)
+                report_progress(progress_callback, (len(pages) + 1) * PAGE_SIZE, total_papers)
+            schedule()
+
+    if pages:
+        print(f"--> [DEBUG] Fetched {len(pages)} more pages ({parallelism} at a time).")
+    return pages
+
+def get_scholar_profile(author_id: str, max_pages: int = 50, progress_callback=None, serp_client=None, parallelism: int = SERPAPI_PARALLELISM):
+    serp_client = serp_client or client
+
+    # --- FIRST PAGE SETUP ---
+    result = fetch_page(serp_client, author_id, 0)
+    profile, matcher = profile_from_first_page(author_id, result)
+    
+    # Try to grab total count for logging
     total_papers = None
+    if "search_information" in result and "total_results" in result["search_information"]:
+         total_papers = result["search_information"]["total_results"]
+         print(f"--> [DEBUG] Google says this author has approx {total_papers} papers.")
 
+    # --- FETCH THE OTHER PAGES CONCURRENTLY ---
+    # total_results is approximate: anything past the prefetched pages is fetched one by one below
+    pages = {0: result}
+    report_progress(progress_callback, len(result.get("articles", [])), total_papers)
+    if total_papers and parallelism > 1 and has_next_page(result):
+        pages.update(prefetch_pages(serp_client, author_id, total_papers, max_pages, parallelism, progress_callback))
+
+    start = 0
     while True:
         # --- FETCH ---
-        result = client.search(
-            engine="google_scholar_author",
-            author_id=author_id,
-            hl="en",
-            start=start,
-            num=page_size 
-        )
-
-        # --- FIRST PAGE SETUP ---
-        if start == 0:
-            author_name = result["author"].get("name")
-            profile["name"] = author_name
-            profile["variations"] = name_variations(author_name or "")
-            profile["affiliations"] = result["author"].get("affiliations")
-            profile["metrics"] = result["cited_by"]["table"]
-            profile["co_authors"] = [co["name"] for co in result.get("co_authors", [])]
-            
-            # Try to grab total count for logging
-            if "search_information" in result and "total_results" in result["search_information"]:
-                 total_papers = result["search_information"]["total_results"]
-                 print(f"--> [DEBUG] Google says this author has approx {total_papers} papers.")
+        result = pages.pop(start) if start in pages else fetch_page(serp_client, author_id, start)
 
         # --- PROCESS ARTICLES ---
         articles = result.get("articles", [])
         if not articles: 
             break
 
-        for article in articles:
-            title = article.get("title", "")
-            authors = article.get("authors", "")
-            pos = get_author_pos(authors, title, profile["variations"])
-
-            profile["publications"].append({
-                "title": title,
-                "authors": authors,
-                "venue": article.get("publication"),
-                "year": article.get("year"),
-                "citations": article.get("cited_by", {}).get("value", 0),
-                "author_pos": pos
-            })
+        profile["publications"].extend(parse_articles(articles, matcher))
 
         # --- DEBUG PRINT: SEE THE ACTUAL COUNT ---
         current_count = len(profile["publications"])
         print(f"--> [DEBUG] Batch finished. Total papers collected so far: {current_count}")
 
         # --- UPDATE PROGRESS (REAL MATH) ---
-        if progress_callback:
-            articles_found = current_count
-            
-            base = 15
-            # If we don't know the total, assume 200. If we passed 200, assume +100 more.
-            estimated_total = total_papers if total_papers else 200 
-            if articles_found > estimated_total: estimated_total = articles_found + 100
-            
-            fraction = articles_found / estimated_total
-            if fraction > 1: fraction = 1
-            
-            real_progress = base + int(fraction * 40)
-            progress_callback(min(real_progress, 55))
+        report_progress(progress_callback, current_count, total_papers)
 
-        start += page_size
+        start += PAGE_SIZE
         
         # Check if we are done 
-        if "serpapi_pagination" not in result or "next" not in result["serpapi_pagination"]:
+        if not has_next_page(result):
             print("--> [DEBUG] No 'Next' page found. Scraping complete.")
             break
             
-        if start >= max_pages * page_size:
+        if start >= max_pages * PAGE_SIZE:
             print("--> [DEBUG] Hit max page limit. Stopping.")
             break
 
     return profile
+
+def get_scholar_profile_incremental(author_id: str, known_titles, max_pages: int = 5, progress_callback=None, serp_client=None):
+    """
+    Refresh of an already stored profile: reads the newest articles first (sort=pubdate)
+    and stops at the first page holding an article we already have, i.e. once it has
+    reached what we already know.
+      known_titles: titles of the stored publications (any container supporting `in`)
+    The returned publications are only the pages read (save with prune=False); their
+    citation counts replace the stored ones, older articles keep theirs until the next
+    full refresh. "caught_up" is False if max_pages ran out first. Those pages are still
+    worth saving: the remaining changes are picked up by the next full refresh.
+    """
+    serp_client = serp_client or client
+    profile, matcher = None, None
+
+    start = 0
+    while True:
+        result = fetch_page(serp_client, author_id, start, sort="pubdate")
+        if profile is None:
+            profile, matcher = profile_from_first_page(author_id, result)
+            profile["caught_up"] = False
+
+        articles = result.get("articles", [])
+        if not articles:
+            profile["caught_up"] = True
+            break
+
+        page = parse_articles(articles, matcher)
+        profile["publications"].extend(page)
+        new = sum(1 for pub in page if pub["title"] not in known_titles)
+        print(f"--> [DEBUG] Incremental page {start // PAGE_SIZE + 1}: {new}/{len(page)} new.")
+
+        report_progress(progress_callback, len(profile["publications"]), len(known_titles) or None)
+        start += PAGE_SIZE
+
+        if new < len(page):
+            print("--> [DEBUG] Reached stored articles. Incremental refresh complete.")
+            profile["caught_up"] = True
+            break
+
+        if not has_next_page(result):
+            profile["caught_up"] = True  # read the whole profile
+            break
+
+        if start >= max_pages * PAGE_SIZE:
+            print("--> [DEBUG] Hit incremental page limit before reaching stored articles.")
+            break
+
+    return profile
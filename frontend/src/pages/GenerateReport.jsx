@@ -175,31 +175,82 @@ export default function GenerateReport() {
 
   useEffect(() => {
     if (!jobId) return;
-    const interval = setInterval(async () => {
-        try {
-            const res = await fetch(`http://localhost:8000/analyze/status/${jobId}`);
-            if (!res.ok) return;
-            const data = await res.json();
-            if (data.progress) setProgress(data.progress);
-            if (data.status === "completed") {
-                clearInterval(interval);
-                setReportData(data.result);
-                cachedReport = data.result;
-                setJobId(null);
-                setIsLoading(false);
-                setProgress(100);
-                addToRecents(data.result);
-            } else if (data.status === "failed") {
-                clearInterval(interval);
-                setJobId(null);
-                setIsLoading(false);
-                alert("Analysis failed: " + (data.error || "Unknown error"));
-            }
-        } catch (err) {
-            console.error("Polling Error:", err);
+    let interval = null;
+    let stream = null;
+    let finished = false;
+
+    // papers are not part of the status payload; page through them once the job is done
+    const fetchAllPapers = async () => {
+        let papers = [];
+        let cursor = null;
+        do {
+            const params = new URLSearchParams({ limit: "1000" });
+            if (cursor) params.set("cursor", cursor);
+            const res = await fetch(`http://localhost:8000/analyze/papers/${jobId}?${params}`);
+            const page = await res.json();
+            papers = papers.concat(page.papers || []);
+            cursor = page.next_cursor;
+        } while (cursor);
+        return papers;
+    };
+
+    const handleStatus = async (data) => {
+        if (data.progress) setProgress(data.progress);
+        if (data.status === "completed") {
+            finished = true;
+            const report = { ...data.result, papers: await fetchAllPapers() };
+            setReportData(report);
+            cachedReport = report;
+            setJobId(null);
+            setIsLoading(false);
+            setProgress(100);
+            addToRecents(report);
+        } else if (data.status === "failed") {
+            finished = true;
+            setJobId(null);
+            setIsLoading(false);
+            alert("Analysis failed: " + (data.error || "Unknown error"));
         }
-    }, 500);
-    return () => clearInterval(interval);
+    };
+
+    // fallback: poll the status endpoint
+    const startPolling = () => {
+        interval = setInterval(async () => {
+            try {
+                const res = await fetch(`http://localhost:8000/analyze/status/${jobId}`);
+                if (!res.ok) return;
+                const data = await res.json();
+                if (finished) return;
+                if (["completed", "failed"].includes(data.status)) clearInterval(interval);
+                await handleStatus(data);
+            } catch (err) {
+                console.error("Polling Error:", err);
+            }
+        }, 500);
+    };
+
+    // preferred: progress + result pushed over Server-Sent Events
+    if (window.EventSource) {
+        stream = new EventSource(`http://localhost:8000/analyze/stream/${jobId}`);
+        const onEvent = (e) => {
+            handleStatus(JSON.parse(e.data));
+            if (finished) stream.close();
+        };
+        stream.addEventListener("progress", onEvent);
+        stream.addEventListener("completed", onEvent);
+        stream.addEventListener("failed", onEvent);
+        stream.onerror = () => {
+            stream.close();
+            if (!finished) startPolling();
+        };
+    } else {
+        startPolling();
+    }
+
+    return () => {
+        if (stream) stream.close();
+        if (interval) clearInterval(interval);
+    };
   }, [jobId]);
 
   const addToRecents = (data) => {
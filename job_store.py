@@ -0,0 +1,175 @@
+import os
+import json
+import time
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timezone, timedelta
+from sqlalchemy import text, select, delete
+from sqlalchemy.dialects.postgresql import insert
+from serialization import dumps
+
+# "memory" (single worker) or "db" (shared by every uvicorn worker)
+JOB_STORE = os.getenv("JOB_STORE", "memory")
+# finished jobs (and their results) are dropped this long after their last update
+JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", "3600"))
+# hard cap on stored jobs; the least recently updated are dropped first
+JOB_STORE_MAX_SIZE = int(os.getenv("JOB_STORE_MAX_SIZE", "1000"))
+
+class JobStore(ABC):
+    """
+    Where job status dicts live ({"status", "progress", "result" | "error", ...}).
+    Entries expire `ttl` seconds after their last write and the store never holds
+    more than `max_size` jobs.
+    """
+
+    def __init__(self, ttl: int, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+
+    @abstractmethod
+    def get(self, job_id: str):
+        ...
+
+    @abstractmethod
+    def set(self, job_id: str, status: dict, papers: list = None):
+        """ Stores the status; papers (the per-paper result rows) are kept apart from it. """
+
+    @abstractmethod
+    def get_papers(self, job_id: str):
+        ...
+
+    @abstractmethod
+    def update(self, job_id: str, **fields):
+        """ Merges fields into an existing job (no-op if the job is unknown). """
+
+    @abstractmethod
+    def delete(self, job_id: str):
+        ...
+
+class MemoryJobStore(JobStore):
+    """ Per-process store: an OrderedDict kept in last-write order. """
+
+    def __init__(self, ttl: int, max_size: int):
+        super().__init__(ttl, max_size)
+        self.jobs = OrderedDict()  # job_id -> (expires_at, status, papers)
+        self.lock = threading.Lock()
+
+    def _evict(self):
+        now = time.monotonic()
+        while self.jobs:
+            job_id, (expires_at, _, _) = next(iter(self.jobs.items()))
+            if expires_at > now and len(self.jobs) <= self.max_size:
+                break
+            del self.jobs[job_id]
+
+    def get(self, job_id: str):
+        with self.lock:
+            entry = self.jobs.get(job_id)
+            if entry is None or entry[0] <= time.monotonic():
+                return None
+            return entry[1]
+
+    def set(self, job_id: str, status: dict, papers: list = None):
+        with self.lock:
+            self.jobs[job_id] = (time.monotonic() + self.ttl, status, papers)
+            self.jobs.move_to_end(job_id)
+            self._evict()
+
+    def get_papers(self, job_id: str):
+        with self.lock:
+            entry = self.jobs.get(job_id)
+            if entry is None or entry[0] <= time.monotonic():
+                return None
+            return entry[2]
+
+    def update(self, job_id: str, **fields):
+        with self.lock:
+            entry = self.jobs.get(job_id)
+            if entry is None:
+                return
+            self.jobs[job_id] = (time.monotonic() + self.ttl, {**entry[1], **fields}, entry[2])
+            self.jobs.move_to_end(job_id)
+
+    def delete(self, job_id: str):
+        with self.lock:
+            self.jobs.pop(job_id, None)
+
+def _to_json(value):
+    # orjson: numpy scalars encoded directly, NaN/Inf stored as null (not valid JSONB otherwise)
+    return dumps(value).decode()
+
+class SqlJobStore(JobStore):
+    """ Shared store in the analysis_jobs table, so a status poll can land on any worker. """
+
+    # expired / excess rows are cleaned up at most this often (seconds)
+    EVICT_EVERY = 60
+
+    def __init__(self, ttl: int, max_size: int):
+        super().__init__(ttl, max_size)
+        from database import engine, analysis_jobs
+        self.engine = engine
+        self.table = analysis_jobs
+        self.last_evict = 0.0
+        self.evict_lock = threading.Lock()
+
+    def _expires_at(self):
+        return datetime.now(timezone.utc) + timedelta(seconds=self.ttl)
+
+    def _evict(self, conn):
+        # one thread per interval claims the cleanup; the others skip it
+        now = time.monotonic()
+        with self.evict_lock:
+            if now - self.last_evict < self.EVICT_EVERY:
+                return
+            self.last_evict = now
+
+        conn.execute(delete(self.table).where(self.table.c.expires_at <= datetime.now(timezone.utc)))
+        keep = select(self.table.c.id).order_by(self.table.c.expires_at.desc()).limit(self.max_size)
+        conn.execute(delete(self.table).where(self.table.c.id.not_in(keep.scalar_subquery())))
+
+    def get(self, job_id: str):
+        with self.engine.begin() as conn:
+            return conn.execute(
+                select(self.table.c.status).where(
+                    (self.table.c.id == job_id) &
+                    (self.table.c.expires_at > datetime.now(timezone.utc))
+                )
+            ).scalar()
+
+    def set(self, job_id: str, status: dict, papers: list = None):
+        payload = json.loads(_to_json(status))
+        papers = json.loads(_to_json(papers)) if papers is not None else None
+        stmt = insert(self.table).values(id=job_id, status=payload, papers=papers, expires_at=self._expires_at())
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["id"],
+            set_={"status": payload, "papers": papers, "expires_at": self._expires_at()}
+        )
+        with self.engine.begin() as conn:
+            conn.execute(stmt)
+            self._evict(conn)
+
+    def get_papers(self, job_id: str):
+        with self.engine.begin() as conn:
+            return conn.execute(
+                select(self.table.c.papers).where(
+                    (self.table.c.id == job_id) &
+                    (self.table.c.expires_at > datetime.now(timezone.utc))
+                )
+            ).scalar()
+
+    def update(self, job_id: str, **fields):
+        with self.engine.begin() as conn:
+            conn.execute(
+                text("UPDATE analysis_jobs SET status = status || CAST(:patch AS JSONB), expires_at = :expires_at WHERE id = :id"),
+                {"patch": _to_json(fields), "expires_at": self._expires_at(), "id": job_id}
+            )
+
+    def delete(self, job_id: str):
+        with self.engine.begin() as conn:
+            conn.execute(delete(self.table).where(self.table.c.id == job_id))
+
+def create_job_store() -> JobStore:
+    if JOB_STORE == "db":
+        return SqlJobStore(JOB_TTL_SECONDS, JOB_STORE_MAX_SIZE)
+    return MemoryJobStore(JOB_TTL_SECONDS, JOB_STORE_MAX_SIZE)
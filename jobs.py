@@ -0,0 +1,177 @@
+import os
+import asyncio
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+# analyses running at the same time (each one is mostly waiting on SerpAPI / the DB)
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "4"))
+# analyses allowed to wait for a worker; more than that and /analyze/start answers 503
+ANALYSIS_QUEUE_SIZE = int(os.getenv("ANALYSIS_QUEUE_SIZE", "50"))
+# processes for the CPU-heavy stages (matching + metrics); 0 runs them in the job thread.
+# Opt-in: each process keeps its own match cache and quality snapshot (not in /cache/stats,
+# only refreshed by its own version poll after an upload) and reports no matching progress.
+ANALYSIS_PROCESSES = int(os.getenv("ANALYSIS_PROCESSES", "0"))
+
+class QueueFull(Exception):
+    """ Raised by AnalysisExecutor.submit when the waiting queue is at capacity. """
+
+class AnalysisExecutor:
+    """
+    Dedicated executor for analysis jobs, so they never occupy the threadpool that
+    serves the other endpoints (e.g. /analyze/status polling).
+      - `workers` threads run jobs; at most `queue_size` more jobs may wait
+      - run_cpu() sends CPU-bound stages to a process pool (pandas + rapidfuzz hold the GIL)
+    """
+
+    def __init__(self, workers: int, queue_size: int, processes: int):
+        self.threads = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analysis")
+        self.workers = workers
+        self.queue_size = queue_size
+        self.process_count = processes
+        self.processes = None  # started on first use
+        self.lock = threading.Lock()
+        self.waiting = deque()  # job ids submitted but not started yet, in order
+        self.running = set()
+
+    def _position(self, index: int):
+        # the first (workers - running) waiting jobs are about to start, not queued
+        free = max(0, self.workers - len(self.running))
+        return max(0, index + 1 - free)
+
+    def submit(self, job_id: str, fn, *args, on_cancel=None):
+        """
+        Queues fn(*args); returns the job's queue position (0 = starts right away).
+        on_cancel() is called instead if the job is dropped before it starts (shutdown).
+        """
+        with self.lock:
+            if self._position(len(self.waiting)) > self.queue_size:
+                raise QueueFull(self._position(len(self.waiting) - 1))
+            self.waiting.append(job_id)
+            position = self._position(len(self.waiting) - 1)
+
+        def run():
+            with self.lock:
+                self.waiting.remove(job_id)
+                self.running.add(job_id)
+            try:
+                fn(*args)
+            finally:
+                with self.lock:
+                    self.running.discard(job_id)
+
+        future = self.threads.submit(run)
+        future.add_done_callback(lambda f: f.cancelled() and self._cancelled(job_id, on_cancel))
+        return position
+
+    def _cancelled(self, job_id: str, on_cancel):
+        with self.lock:
+            if job_id in self.waiting:
+                self.waiting.remove(job_id)
+        if on_cancel is not None:
+            on_cancel()
+
+    def queue_position(self, job_id: str):
+        """ 1-based position among queued jobs, 0 if running/finished. """
+        with self.lock:
+            try:
+                return self._position(self.waiting.index(job_id))
+            except ValueError:
+                return 0
+
+    def run_cpu(self, fn, *args):
+        """ Runs fn(*args) in the process pool (or inline if disabled) and returns its result. """
+        if self.process_count <= 0:
+            return fn(*args)
+        with self.lock:
+            if self.processes is None:
+                # spawn: children import our modules fresh (own DB engine, own quality snapshot)
+                self.processes = ProcessPoolExecutor(
+                    max_workers=self.process_count,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+        return self.processes.submit(fn, *args).result()
+
+    def stats(self):
+        with self.lock:
+            return {
+                "workers": self.workers,
+                "processes": self.process_count,
+                "running": len(self.running),
+                "queued": self._position(len(self.waiting) - 1),
+                "queue_size": self.queue_size
+            }
+
+    def shutdown(self):
+        self.threads.shutdown(wait=False, cancel_futures=True)
+        if self.processes is not None:
+            self.processes.shutdown(wait=False, cancel_futures=True)
+
+analysis_executor = AnalysisExecutor(ANALYSIS_WORKERS, ANALYSIS_QUEUE_SIZE, ANALYSIS_PROCESSES)
+
+class SingleFlight:
+    """
+    Coalesces identical in-flight jobs: the first job for a key becomes the leader and
+    later jobs for the same key just follow it (sharing its progress and result).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.leaders = {}  # key -> leader job id
+
+    def join(self, key, job_id: str):
+        """ Returns the leader's job id if one is running, else registers job_id as leader and returns None. """
+        with self.lock:
+            leader = self.leaders.get(key)
+            if leader is not None:
+                return leader
+            self.leaders[key] = job_id
+            return None
+
+    def done(self, key, job_id: str):
+        with self.lock:
+            if self.leaders.get(key) == job_id:
+                del self.leaders[key]
+
+    def stats(self):
+        with self.lock:
+            return {"in_flight": len(self.leaders)}
+
+single_flight = SingleFlight()
+
+class JobEvents:
+    """
+    Pushes job status changes to streaming clients. Jobs run on worker threads, so
+    events are handed to each subscriber's event loop with call_soon_threadsafe.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = {}  # job id -> [(loop, asyncio.Queue)]
+
+    def subscribe(self, job_id: str):
+        """ Must be called from the event loop; returns the queue events arrive on. """
+        queue = asyncio.Queue()
+        with self.lock:
+            self.subscribers.setdefault(job_id, []).append((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, job_id: str, queue):
+        with self.lock:
+            subs = [s for s in self.subscribers.get(job_id, []) if s[1] is not queue]
+            if subs:
+                self.subscribers[job_id] = subs
+            else:
+                self.subscribers.pop(job_id, None)
+
+    def publish(self, job_id: str, status: dict):
+        with self.lock:
+            subs = list(self.subscribers.get(job_id, []))
+        for loop, queue in subs:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, status)
+            except RuntimeError:
+                pass  # loop already closed (client gone / shutting down)
+
+job_events = JobEvents()
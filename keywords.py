@@ -0,0 +1,29 @@
+import re
+import collections
+
+STOPWORDS = {
+    'using', 'based', 'approach', 'system', 'analysis', 'study', 'research',
+    'evaluation', 'framework', 'method', 'towards', 'process', 'new', 'multi',
+    'systematic', 'review', 'perspective', 'case', 'application', 'design',
+    'efficient', 'optimization', 'performance', 'modeling', 'via', 'learning',
+    'intelligent', 'automated', 'data', 'information', 'implementation', 'with',
+    'and', 'of', 'a', 'in', 'for', 'on', 'to', 'an', 'at', 'survey', 'development',
+    'comparative', 'algorithm', 'model', 'data', 'user' , 'proposed'
+}
+
+NON_LETTERS = re.compile(r'[^a-zA-Z\s]')
+
+def title_terms(title):
+    """ Keyword terms of one title (letters only, lowercase, > 3 chars, no stopwords). """
+    clean_title = NON_LETTERS.sub('', str(title)).lower()
+    return [word for word in clean_title.split() if len(word) > 3 and word not in STOPWORDS]
+
+def count_terms(titles) -> collections.Counter:
+    counts = collections.Counter()
+    for title in titles:
+        counts.update(title_terms(title))
+    return counts
+
+def top_terms(counts: collections.Counter, top_n: int):
+    """ [(term, count)] by count, ties by term (the order load_top_keywords uses too). """
+    return sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:top_n]
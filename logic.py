@@ -1,24 +1,19 @@
+import os
 import re
+import numpy as np
 import pandas as pd
-import string
-import collections
-from rapidfuzz import process, fuzz
 from datetime import datetime, timezone
 
-from database import engine, load_author_profile, save_author_profile, update_publication_venues
-from fetchProfile import get_scholar_profile
-
-def normalize_text(s: str) -> str:
-    if not isinstance(s, str): return ""
-    s = s.lower()
-    s = s.replace('-', ' ')
-    s = re.sub(r'\b\d+(st|nd|rd|th)\b', '', s)
-    s = re.sub(r'\b\d+[-–]\d+\b', '', s) 
-    s = re.sub(r'\b(pp|vol|no|issue)\.?\s*\d+', '', s)
-    s = re.sub(r'\b(19|20)\d{2}\b', '', s)
-    s = re.sub(r'\b\d+\b', '', s)
-    s = s.translate(str.maketrans("", "", string.punctuation))
-    return re.sub(r"\s+", " ", s).strip()
+from database import (
+    load_author_profile, save_author_profile, update_publication_venues,
+    load_venue_matches, save_venue_matches, load_top_keywords, rebuild_researcher_keywords, safe_int
+)
+from fetchProfile import get_scholar_profile, get_scholar_profile_incremental
+from venue_matcher import MatchCache, MATCH_COLUMNS, normalize_text, venue_key
+from quality_data import get_snapshot
+from metrics import author_metrics, author_metrics_batch
+from name_variations import AuthorMatcher
+from keywords import count_terms, top_terms
 
 def get_rank_from_row(row):
     val = row.get("rank")
@@ -26,43 +21,33 @@ def get_rank_from_row(row):
         return str(val).strip()
     return "-"
 
-def load_quality_data():
-    """ Fetches the faculty quality data from Supabase. """
-    with engine.begin() as conn:
-        journals = pd.read_sql("SELECT * FROM journals_quality", conn)
-        conferences = pd.read_sql("SELECT * FROM conferences_quality", conn)
-    
-    journals["Title"] = journals["Title"].astype(str)
-    conferences["Title"] = conferences["Title"].astype(str)
-    
-    journals["Title_norm"] = journals["Title"].apply(normalize_text)
-    conferences["Title_norm"] = conferences["Title"].apply(normalize_text)
-
-    return journals, conferences
-
 def extract_top_keywords(df, top_n=5):
-    STOPWORDS = {
-        'using', 'based', 'approach', 'system', 'analysis', 'study', 'research',
-        'evaluation', 'framework', 'method', 'towards', 'process', 'new', 'multi',
-        'systematic', 'review', 'perspective', 'case', 'application', 'design',
-        'efficient', 'optimization', 'performance', 'modeling', 'via', 'learning',
-        'intelligent', 'automated', 'data', 'information', 'implementation', 'with',
-        'and', 'of', 'a', 'in', 'for', 'on', 'to', 'an', 'at', 'survey', 'development',
-        'comparative', 'algorithm', 'model', 'data', 'user' , 'proposed'
-    }
-    
-    words = []
-    for title in df['title']:
-        clean_title = re.sub(r'[^a-zA-Z\s]', '', str(title)).lower()
-        for word in clean_title.split():
-            if len(word) > 3 and word not in STOPWORDS:
-                words.append(word)       
-    counts = collections.Counter(words).most_common(top_n)
+    """ Top terms straight from the titles (used when the stored keyword index is unavailable). """
+    counts = top_terms(count_terms(df['title']), top_n)
 
     return [{"text": word, "count": count} for word, count in counts]
 
-print("Loading Quality Data...")
-journals, conferences = load_quality_data()
+# "count" (most frequent title terms) or "tfidf" (weighted against every stored researcher)
+KEYWORD_WEIGHTING = os.getenv("KEYWORD_WEIGHTING", "count")
+
+def top_keywords(author_id, df, top_n=5):
+    """
+    Top keywords from the stored researcher_keywords index. A researcher saved before the
+    index existed is backfilled on first use; without the DB they come from the titles.
+    """
+    try:
+        keywords = load_top_keywords(author_id, top_n, weighting=KEYWORD_WEIGHTING)
+        if keywords is None:
+            rebuild_researcher_keywords(author_id)
+            keywords = load_top_keywords(author_id, top_n, weighting=KEYWORD_WEIGHTING)
+        if keywords is not None:
+            return keywords
+    except Exception as e:
+        print(f"Warning: Could not load stored keywords: {e}")
+    return extract_top_keywords(df, top_n)
+
+# in-process LRU of match results, on top of the shared venue_matches table
+match_cache = MatchCache(maxsize=int(os.getenv("MATCH_CACHE_SIZE", "50000")))
 
 # def get_lookup_dicts(journals_df, conferences_df):
 #     lookup = {}
@@ -89,7 +74,20 @@ def extract_author_id(url):
     match = re.search(r"user=([\w-]+)", url)
     return match.group(1) if match else None
 
+def parse_author_ref(value: str):
+    """ Scholar author id from a profile URL or a bare id; None if it is neither. """
+    value = (value or "").strip()
+    if "scholar.google" in value:
+        return extract_author_id(value)
+    return value if re.fullmatch(r"[\w-]+", value) else None
+
+# stale profiles are refreshed by reading only the newest articles (usually one SerpAPI call)...
+INCREMENTAL_REFRESH = os.getenv("INCREMENTAL_REFRESH", "1") == "1"
+# ...but at least this often every page is re-read (old papers' citations, deleted papers)
+FULL_REFRESH_DAYS = int(os.getenv("FULL_REFRESH_DAYS", "30"))
+
 def load_or_fetch_author(author_id: str, refresh_days: int = 7, force_refresh: bool = False, progress_callback=None):
+    profile = None
     # if NOT forcing refresh, try to load from db
     if not force_refresh:
         if progress_callback: progress_callback(10)
@@ -107,6 +105,23 @@ def load_or_fetch_author(author_id: str, refresh_days: int = 7, force_refresh: b
                     return profile
 
     if progress_callback: progress_callback(15)
+
+    # stale, recently fully scraped profile: merge in only what is new or changed
+    last_full = profile.get("last_full_scrape") if profile else None
+    if INCREMENTAL_REFRESH and last_full and (datetime.now(timezone.utc) - last_full).days < FULL_REFRESH_DAYS:
+        known = {p["title"]: p["citations"] for p in profile["publications"]}
+        scraped_data = get_scholar_profile_incremental(author_id, known, progress_callback=progress_callback)
+        changed = sum(1 for p in scraped_data["publications"]
+                      if p["title"] in known and known[p["title"]] != (safe_int(p["citations"]) or 0))
+        print(f"--> Incremental refresh: {len(scraped_data['publications'])} articles read, {changed} with new citation counts.")
+        if not scraped_data["caught_up"]:
+            # keep what was read; last_full_scrape is left alone, so the next full refresh
+            # (at most FULL_REFRESH_DAYS away) picks up the rest
+            print("--> Incremental refresh did not catch up, saving the pages read.")
+        if progress_callback: progress_callback(55)
+        save_author_profile(scraped_data, prune=False)
+        return load_author_profile(author_id)
+
     # if force_refresh is True OR cache is old/missing, scrape fresh
     scraped_data = get_scholar_profile(author_id, progress_callback=progress_callback)
 
@@ -118,168 +133,90 @@ def load_or_fetch_author(author_id: str, refresh_days: int = 7, force_refresh: b
 
     return clean_profile
 
-def guesser(venue: str) -> str:
-    """
-    Guess if the venue is a conference or journal based on keywords and strong acronyms.
-    If a venue has keywords that definetly only belong to conferences then we set the conference_certainty = TRUE
-        - Goal here is to avoid false matches due to high token overlap with the journals quality data
-    Input: venue string
-    Return: "conference", "journal", or "unknown" and boolean for conference quality 
-    """
-    v = venue.lower()
-    conf_keywords = [
-        "conference", "conf.", "workshop", "symposium", "proceedings",
-        "meeting", "colloquium", "seminar", "summit", "annual"
-    ]
-    journ_keywords = [
-        "journal", "transactions", "trans.", "letters", "magazine",
-        "revue", "revista", "annals", "archives", "bulletin", "preprints", "print"
-    ]
-    conf_acronyms = [
-        "icml", "neurips", "nips", "aaai", "ijcai", "cvpr", "iccv", "eccv",
-        "kdd", "sdm", "aistats", "emnlp", "acl", "naacl", "eacl", "iclr",
-        "icra", "iros", "uai", "ecml", "pkdd"
-    ]
-    conference_certainty = False
-    if any(k in v for k in conf_keywords):
-        conference_certainty = True
-        return("Conference", conference_certainty)
-    if any(a in v for a in conf_acronyms):
-        return("Conference", conference_certainty)
-    if any(k in v for k in journ_keywords):
-        return("Journal", conference_certainty)
-    return("Unknown", conference_certainty)
-
 def match_quality(venue: str, is_cs_ai=False):
     """
     For each venue:
       1) guesser(venue) -> hint + conference_confidence
-      2) Try exact match OR token overlap >= 0.70 in the hinted dataset(s)
+      2) Exact Title_norm / acronym lookup, then token overlap >= 0.70 in the hinted dataset(s)
       3) Only if conference_confidence == False: fuzzy fallback (avoid matching false journals)
     Returns:
       (match_type, matched_title, rank, match_score, source)
     """
-    # --- guards ---
-    if pd.isna(venue) or not isinstance(venue, str) or not venue.strip():
-        return ("Error", None, "-", 0.0, "Invalid venue")
-
-    venue_norm = normalize_text(venue)
-    if not venue_norm:
-        return ("Error", None, "-", 0.0, "Normalization failed")
-
-    venue_tokens = set(venue_norm.split())
-    if not venue_tokens:
-        return ("Error", None, "-", 0.0, "No tokens")
-
-    hint, conference_confidence = guesser(venue)  
-    
-    def clean_rank(val):
-        if pd.isna(val):
-            return "-"
-        s = str(val).strip()
-        return s if s and s.lower() not in {"nan", "none"} else "-"
-
-    # --- choose search order based on hint + confidence ---
-    if hint == "conference":
-        search_order = [(conferences, "Conference")]
-        # only try journals too if not fully confident it's a conference
-        if not conference_confidence:
-            search_order.append((journals, "Journal"))
-    elif hint == "journal":
-        search_order = [(journals, "Journal"), (conferences, "Conference")]
-    else:
-        search_order = [(conferences, "Conference"), (journals, "Journal")]
-
-    # --- stage 1: exact OR token overlap >= 0.70 ---
-    def exact_or_token_match(df: pd.DataFrame, kind: str):
-        if df is None or df.empty or "Title_norm" not in df.columns:
-            return None
-
-        for _, row in df.iterrows():
-            title_raw = row.get("Title")
-            title_norm = row.get("Title_norm")
-
-            if pd.isna(title_raw) or pd.isna(title_norm):
-                continue
-
-            title_norm = str(title_norm).strip()
-            if not title_norm:
-                continue
-
-            # Exact normalized match
-            if venue_norm == title_norm:
-                return (
-                    kind,
-                    str(title_raw),
-                    clean_rank(row.get("rank")),
-                    100.0,
-                    "DB (Exact)",
-                )
-
-            # Token overlap >= 70%
-            title_tokens = set(title_norm.split())
-            if not title_tokens:
-                continue
-
-            overlap = len(venue_tokens & title_tokens) / max(len(venue_tokens), len(title_tokens))
-            if overlap >= 0.70:
-                return (
-                    kind,
-                    str(title_raw),
-                    clean_rank(row.get("rank")),
-                    round(overlap * 100, 2),
-                    "DB (Token≥70%)",
-                )
-
-        return None
+    snapshot = get_snapshot()
+    if not normalize_text(venue):
+        return snapshot.matcher.match(venue, is_cs_ai)
+
+    key = venue_key(venue)
+    res = match_cache.get((key, is_cs_ai, snapshot.version))
+    if res is None:
+        res = snapshot.matcher.match(key, is_cs_ai)
+        match_cache.put((key, is_cs_ai, snapshot.version), res)
+    return res
+
+def match_quality_batch(venues, is_cs_ai=False, progress_callback=None, snapshot=None):
+    """
+    Same as match_quality for a whole list of venues; the fuzzy stage scores every
+    remaining venue against every title in one multi-core rapidfuzz cdist call.
+    Returns a DataFrame indexed by venue with columns: type, title, rank, score, source
+    """
+    snapshot = snapshot or get_snapshot()
+    return snapshot.matcher.match_many(venues, is_cs_ai, progress_callback=progress_callback)
 
-    for df, kind in search_order:
-        res = exact_or_token_match(df, kind)
-        if res:
-            return res
-
-    # --- stage 2: fuzzy ONLY if conference_confidence is False ---
-    if conference_confidence is False:
-        def best_fuzzy(df: pd.DataFrame, kind: str):
-            if df is None or df.empty or "Title" not in df.columns:
-                return None
-
-            titles = df["Title"].astype(str).tolist()
-            result = process.extractOne(venue, titles, scorer=fuzz.WRatio)
-            if not result:
-                return None
-
-            match_title, score, _ = result
-            row = df[df["Title"].astype(str) == str(match_title)].iloc[0]
-            return (
-                kind,
-                str(match_title),
-                clean_rank(row.get("rank")),
-                float(score),
-                "DB (Fuzzy)",
-            )
-
-        candidates = []
-        if hint == "conference":
-            c = best_fuzzy(conferences, "Conference")
-            if c: candidates.append(c)
-        elif hint == "journal":
-            j = best_fuzzy(journals, "Journal")
-            if j: candidates.append(j)
-        else:
-            c = best_fuzzy(conferences, "Conference")
-            if c: candidates.append(c)
-            j = best_fuzzy(journals, "Journal")
-            if j: candidates.append(j)
-
-        if candidates:
-            best = max(candidates, key=lambda x: x[3])
-            if best[3] >= 90:  
-                return best
-
-    return (hint, None, "-", 0.0, "No match")
-
-def evaluate_author_data_headless(data, cs_ai, progress_callback=None):
+def match_venues_cached(venues, is_cs_ai=False, progress_callback=None, snapshot=None):
+    """
+    match_quality_batch behind two caches: the in-process LRU, then the shared
+    venue_matches table. Results are the same for every researcher, so venues already
+    matched against this quality version are looked up in bulk and only the rest reach
+    the matcher (and are then stored for everyone). Both caches are keyed on venue_key():
+    "Nature 521 (7553), 436-444" and "Nature, 2015" share one entry, and the matcher
+    sees that key too, so the entry holds exactly what it would have computed.
+    """
+    snapshot = snapshot or get_snapshot()
+    version = snapshot.version
+    venues = list(dict.fromkeys(venues))
+    # venues that normalize to nothing are cheap Error results, not worth caching
+    keys = {v: venue_key(v) for v in venues if normalize_text(v)}
+    unique_keys = list(dict.fromkeys(keys.values()))
+
+    cached = {}
+    for key in unique_keys:
+        res = match_cache.get((key, is_cs_ai, version))
+        if res is not None:
+            cached[key] = res
+
+    try:
+        stored = load_venue_matches([k for k in unique_keys if k not in cached], version)
+    except Exception as e:
+        print(f"Warning: Could not load cached venue matches: {e}")
+        stored = {}
+
+    for key, res in stored.items():
+        cached[key] = res
+        match_cache.put((key, is_cs_ai, version), res)
+
+    to_match = [k for k in unique_keys if k not in cached]
+    unkeyed = [v for v in venues if v not in keys]
+    matches = match_quality_batch(to_match + unkeyed, is_cs_ai, progress_callback=progress_callback, snapshot=snapshot)
+
+    results = dict(zip(matches.index, matches.itertuples(index=False, name=None)))
+    new_matches = {key: results[key] for key in to_match}
+    for key, res in new_matches.items():
+        match_cache.put((key, is_cs_ai, version), res)
+    try:
+        save_venue_matches(new_matches, version)
+    except Exception as e:
+        print(f"Warning: Could not save venue matches to DB: {e}")
+
+    results.update(cached)
+    return pd.DataFrame(
+        [results[keys.get(v, v)] for v in venues], index=pd.Index(venues, dtype=object), columns=MATCH_COLUMNS
+    )
+
+# recent_p / recent_c cover papers from the last RECENT_YEARS years
+RECENT_YEARS = 5
+
+def publications_frame(data):
+    """ The author's publications with numeric year / citations and a rank column. """
     df = pd.DataFrame(data["publications"])
 
     df["year"] = pd.to_numeric(df.get("year"), errors="coerce")
@@ -287,44 +224,113 @@ def evaluate_author_data_headless(data, cs_ai, progress_callback=None):
     
     if "rank" not in df.columns:
         df["rank"] = None 
+    return df
+
+def needs_match(df):
+    """ Rows to match: rank is NULL/empty (strings like "NaN", "-", "N/A", "Q1" are kept). """
+    return df["rank"].isna() | (df["rank"] == "")
+
+def evaluate_authors_batch(datas, cs_ai, progress_callback=None):
+    """
+    evaluate_author_data_headless for many authors against one snapshot: venues are
+    deduplicated across every author and matched in a single batch, then each author is
+    evaluated with those matches. Returns [(metrics, df, error)] in the order of datas;
+    an author that fails has (None, None, message) and does not fail the others.
+    """
+    snapshot = get_snapshot()
+    errors = [None] * len(datas)
+
+    frames = [None] * len(datas)
+    venues = set()
+    for i, data in enumerate(datas):
+        try:
+            df = publications_frame(data)
+            if "venue" in df.columns:
+                venues.update(df.loc[needs_match(df), "venue"].dropna())
+            frames[i] = df
+        except Exception as e:
+            errors[i] = f"Could not read publications: {e}"
+
+    # citation metrics of every author in one stacked pass (per author below if that fails)
+    ok = [i for i, df in enumerate(frames) if df is not None]
+    citation_stats = [None] * len(datas)
+    try:
+        stats = author_metrics_batch(
+            [frames[i]["citations"].to_numpy() for i in ok],
+            [frames[i]["year"].to_numpy() for i in ok],
+            since=datetime.now().year - RECENT_YEARS
+        )
+        for i, stat in zip(ok, stats):
+            citation_stats[i] = stat
+    except Exception as e:
+        print(f"--> Batch: stacked citation metrics failed ({e}), computing per author.")
+
+    def matching_progress(fraction):
+        if progress_callback:
+            progress_callback(int(fraction * 80))
+
+    matches = match_venues_cached(list(venues), cs_ai, progress_callback=matching_progress, snapshot=snapshot)
+    print(f"--> Batch: {len(venues)} distinct venues to match across {len(datas)} authors.")
+
+    results = []
+    for i, data in enumerate(datas):
+        metrics, df = None, None
+        if errors[i] is None:
+            try:
+                metrics, df = evaluate_author_data_headless(
+                    data, cs_ai, snapshot=snapshot, matches=matches, citation_stats=citation_stats[i]
+                )
+            except Exception as e:
+                print(f"--> Batch: evaluating {data.get('author_id')} failed: {e}")
+                errors[i] = str(e)
+        results.append((metrics, df, errors[i]))
+        if progress_callback:
+            progress_callback(80 + int((i + 1) / len(datas) * 20))
+    return results
+
+def evaluate_author_data_headless(data, cs_ai, progress_callback=None, snapshot=None, matches=None, citation_stats=None):
+    """
+    matches / citation_stats: precomputed by evaluate_authors_batch (venue matches
+    covering this author, metrics.author_metrics result); computed here when not given.
+    """
+    # the whole analysis runs against one snapshot, even if a reload swaps in a new one
+    snapshot = snapshot or get_snapshot()
+
+    df = publications_frame(data)
 
     # --- OPTIMIZED VENUE MATCHING (strict NULL/empty check) ---
     # match ONLY if rank is NULL/empty
     # this automatically SKIPS strings like "NaN", "-", "N/A", "Q1", etc.
-    needs_match_mask = df["rank"].isna() | (df["rank"] == "")
+    needs_match_mask = needs_match(df)
     
     # get venues ONLY for empty rows
     venues_to_check = df.loc[needs_match_mask, "venue"].dropna()
     unique_venues_to_check = list(set(venues_to_check))
     
-    # run matching logic ONLY on specific unknown venues
+    # run matching logic ONLY on specific unknown venues, all in one batch
     # (if all ranks are "-", "NaN", or "Q1", this runs 0 times = INSTANT)
-    venue_cache = {}
-    total_venues = len(unique_venues_to_check)
-
-    for i, venue in enumerate(unique_venues_to_check):
-        venue_cache[venue] = match_quality(venue, cs_ai)
+    def matching_progress(fraction):
         if progress_callback:
-            pct = 60 + int((i / total_venues) * 30)
-            progress_callback(pct)
+            progress_callback(60 + int(fraction * 30))
+
+    if matches is None:
+        matches = match_venues_cached(unique_venues_to_check, cs_ai, progress_callback=matching_progress, snapshot=snapshot)
 
     # apply results back to df
     if not venues_to_check.empty:
-        # map results
-        matched_results = df.loc[needs_match_mask, "venue"].map(venue_cache)
-
-        # expand tuple results into columns
-        new_data = matched_results.apply(
-            lambda x: pd.Series(x if isinstance(x, (tuple, list)) else (None, None, "-", 0.0, None))
-        )
-        new_data.columns = ["calc_type", "calc_title", "calc_rank", "calc_score", "calc_source"]
+        # columnar results line up with the masked rows through the venue string
+        new_data = matches.reindex(df.loc[needs_match_mask, "venue"])
+        new_data.index = df.index[needs_match_mask]
+        new_data["rank"] = new_data["rank"].fillna("-")
+        new_data["score"] = new_data["score"].fillna(0.0)
+        new_data = new_data.astype(object).where(new_data.notna(), None)
 
         # update main df with new calculations
-        df.loc[needs_match_mask, "rank"] = new_data["calc_rank"]
-        df.loc[needs_match_mask, "venue_type"] = new_data["calc_type"]
-        df.loc[needs_match_mask, "matched_title"] = new_data["calc_title"]
-        df.loc[needs_match_mask, "match_score"] = new_data["calc_score"]
-        df.loc[needs_match_mask, "source"] = new_data["calc_source"]
+        df.loc[needs_match_mask, "rank"] = new_data["rank"]
+        df.loc[needs_match_mask, "venue_type"] = new_data["type"]
+        df.loc[needs_match_mask, "matched_title"] = new_data["title"]
+        df.loc[needs_match_mask, "match_score"] = new_data["score"]
+        df.loc[needs_match_mask, "source"] = new_data["source"]
 
         # --- SAVE TO DATABASE ---
         try:
@@ -333,80 +339,44 @@ def evaluate_author_data_headless(data, cs_ai, progress_callback=None):
             print(f"Warning: Could not save updates to DB: {e}")
 
     # --- STANDARD METRICS CALCULATIONS ---
-    citations = sorted(df["citations"].tolist(), reverse=True)
-    h_index = sum(x >= i + 1 for i, x in enumerate(citations))
-    i10_index = sum(x >= 10 for x in citations)
-    
-    g_index = 0
-    for i in range(len(citations)):
-        if sum(citations[:i+1]) >= (i+1)**2: 
-            g_index = i + 1
+    current_year = datetime.now().year
+    if citation_stats is None:
+        citation_stats = author_metrics(df["citations"].to_numpy(), df["year"].to_numpy(), since=current_year - RECENT_YEARS)
     
     min_year = df["year"].min()
-    current_year = datetime.now().year
     academic_age = current_year - min_year if pd.notna(min_year) else 1
     if academic_age < 1: academic_age = 1
 
-    # --- AUTHOR CLEANING & NETWORK ---
-    target_name_parts = data["name"].lower().split()
-    target_last = target_name_parts[-1]
-
-    all_authors = []
-    for auth_str in df["authors"].dropna():
-        names = [n.strip() for n in str(auth_str).split(",")]
-        clean_names = [n for n in names if "..." not in n and len(n) > 1]
-        all_authors.extend(clean_names)
-    
-    unique_authors = set(all_authors)
-    unique_authors = {a for a in unique_authors if target_last not in a.lower()}
-    network_size = len(unique_authors)
-
-    # --- ROLE LOGIC ---
-    def get_role(authors_str):
-        if not authors_str: return "Unknown"
-        parts_raw = [p.strip().lower() for p in str(authors_str).split(",")]
-        has_ellipsis = any("..." in p for p in parts_raw)
-        parts = [p for p in parts_raw if "..." not in p]
-        
-        if not parts: return "Unknown"
-        if len(parts) == 1:
-            return "Solo Author" if target_last in parts[0] else "Unknown"
-        if target_last in parts[0]: return "First Author"
-        if not has_ellipsis and target_last in parts[-1]: return "Last Author"
-        for p in parts[1:]:
-            if target_last in p: return "Co-Author"
-        if has_ellipsis: return "Ambiguous"
-        return "Unknown"
-
-    df["role"] = df["authors"].apply(get_role)
+    # --- AUTHOR CLEANING, NETWORK & ROLES (one pass over the authors strings) ---
+    matcher = AuthorMatcher.from_name(data["name"])
+    roles, coauthors = matcher.roles_and_coauthors(df["authors"])
+    network_size = len(coauthors)
+    df["role"] = roles
     
     lead_count = df[df["role"].isin(["Solo Author", "First Author"])].shape[0]
     leadership_score = round((lead_count / len(df)) * 100, 1) if len(df) > 0 else 0
 
-    recent_df = df[df["year"] >= (current_year - 5)]
-    recent_p = len(recent_df)
-    recent_c = recent_df["citations"].sum()
-
-    total_c = df["citations"].sum()
-    max_c = df["citations"].max() if len(df) > 0 else 0
-    one_hit = round((max_c / total_c) * 100, 1) if total_c > 0 else 0
+    total_c = citation_stats["total_c"]
+    max_c = citation_stats["max_c"]
+    # np.float64 keeps numpy's rounding, as when these were pandas sums
+    one_hit = round((np.float64(max_c) / total_c) * 100, 1) if total_c > 0 else 0
     
     res = {
         "id": data["author_id"], 
         "name": data["name"],
         "total_p": len(df), 
-        "total_c": int(total_c),
-        "h_index": h_index, 
-        "i10_index": i10_index, 
-        "g_index": g_index,
+        "total_c": total_c,
+        "h_index": citation_stats["h_index"], 
+        "i10_index": citation_stats["i10_index"], 
+        "g_index": citation_stats["g_index"],
         "academic_age": int(academic_age),
         "cpp": round(df["citations"].mean(), 1) if len(df) > 0 else 0,
         "leadership_score": leadership_score,
         "network_size": network_size,
-        "recent_p": recent_p, 
-        "recent_c": int(recent_c),
+        "recent_p": citation_stats["recent_p"], 
+        "recent_c": citation_stats["recent_c"],
         "one_hit": one_hit,
-        "keywords": extract_top_keywords(df)
+        "keywords": top_keywords(data["author_id"], df)
     }
     
     return res, df
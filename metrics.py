@@ -0,0 +1,64 @@
+import numpy as np
+
+# Citation metrics on NumPy arrays. Several authors are computed at once by stacking
+# their (descending) citation arrays into one zero-padded matrix plus a length mask;
+# a single author is just a batch of one, so both paths give the same values.
+
+def _stack(arrays, fill, dtype):
+    """ Rows of a (len(arrays), longest) matrix padded with fill, and the mask of real cells. """
+    lengths = np.array([len(a) for a in arrays], dtype=np.int64)
+    width = int(lengths.max(initial=0))
+    mask = np.arange(width) < lengths[:, None]
+    stacked = np.full((len(arrays), width), fill, dtype=dtype)
+    stacked[mask] = np.concatenate(arrays) if arrays else []
+    return stacked, mask
+
+def author_metrics_batch(citation_lists, year_lists, since: int):
+    """
+    For each author (citations[i], years[i] of their papers):
+      h_index, g_index, i10_index, total_c, max_c
+      recent_p / recent_c: papers (and their citations) with year >= since
+    Returns one dict of plain ints per author.
+    """
+    citations = [np.asarray(c, dtype=np.int64) for c in citation_lists]
+    years = [np.asarray(y, dtype=np.float64) for y in year_lists]
+
+    # sort each row descending; padding (-1) sorts after every real count, then becomes 0
+    c, mask = _stack(citations, -1, np.int64)
+    c = -np.sort(-c, axis=1)
+    c[~mask] = 0
+    ranks = np.arange(1, c.shape[1] + 1)
+
+    # h: descending counts vs ascending ranks, so c >= rank holds for a prefix
+    h_index = np.count_nonzero((c >= ranks) & mask, axis=1)
+    i10_index = np.count_nonzero((c >= 10) & mask, axis=1)
+
+    # g: the largest rank whose top-rank papers have at least rank^2 citations
+    reached = (np.cumsum(c, axis=1) >= ranks ** 2) & mask
+    g_index = np.where(reached, ranks, 0).max(axis=1, initial=0)
+
+    total_c = c.sum(axis=1)
+    max_c = c.max(axis=1, initial=0)
+
+    # recent window (missing years never count); same row order as the unsorted inputs
+    y, _ = _stack(years, np.nan, np.float64)
+    raw, _ = _stack(citations, 0, np.int64)
+    recent = y >= since
+    recent_p = np.count_nonzero(recent, axis=1)
+    recent_c = np.where(recent, raw, 0).sum(axis=1)
+
+    return [
+        {
+            "h_index": int(h_index[i]),
+            "g_index": int(g_index[i]),
+            "i10_index": int(i10_index[i]),
+            "total_c": int(total_c[i]),
+            "max_c": int(max_c[i]),
+            "recent_p": int(recent_p[i]),
+            "recent_c": int(recent_c[i]),
+        }
+        for i in range(len(citations))
+    ]
+
+def author_metrics(citations, years, since: int):
+    return author_metrics_batch([citations], [years], since)[0]
@@ -68,4 +68,104 @@ def name_variations(full_name: str) -> List[str]:
         variants.add(f"{last_initial}{first_initial} {middle_full}")
 
     # Return everything lowercased for matching
-    return [name.lower() for name in variants]
\ No newline at end of file
+    return [name.lower() for name in variants]
+
+
+class AuthorMatcher:
+    """
+    One researcher's name, compiled once and reused for every publication: the name
+    variations as a single regex alternation, which author positions, roles and the
+    co-author network all recognize the researcher by.
+    """
+
+    def __init__(self, variations: List[str]):
+        self.variations = list(variations)
+        # longest first, so a variant is never shadowed by one of its own prefixes; whole
+        # words only, or "w li" would find Wei Li in "W Lim"
+        alternation = "|".join(re.escape(v) for v in sorted(self.variations, key=len, reverse=True))
+        self.variant_re = re.compile(rf"(?<!\w)(?:{alternation})(?!\w)") if self.variations else None
+
+    @classmethod
+    def from_name(cls, full_name: str):
+        # without a name every paper would look single-authored and nobody a co-author
+        if not (full_name or "").strip():
+            raise ValueError("Researcher has no name to match authors against.")
+        return cls(name_variations(full_name))
+
+    def is_self(self, author: str) -> bool:
+        """ Whether one lowercased name from an authors list is the researcher. """
+        return self.variant_re is not None and self.variant_re.search(author) is not None
+
+    def author_pos(self, authors: str, title: str) -> str:
+        """ 1-based position in the authors list ("3", "5+" if hidden behind "...", "-"). """
+        # track people found in og authors list
+        authors_list_count = 0
+
+        if authors:
+            clean_str = authors.replace("...", "")
+            indiv_authors = [p.strip().lower() for p in clean_str.split(",") if p.strip()]
+            authors_list_count = len(indiv_authors)
+
+            if self.variant_re is not None:
+                for i, person in enumerate(indiv_authors):
+                    if self.variant_re.search(person):
+                        return str(i + 1)  # found in default place directly
+
+        # check title (for publications that list authors in title)
+        if title and self.variant_re is not None:
+            title = title.lower()
+            if self.variant_re.search(title):
+                # position of the first variant (in order) found, as the per-variant scan did
+                for v in self.variations:
+                    found = re.search(rf"(?<!\w){re.escape(v)}(?!\w)", title)
+                    if found:
+                        commas_in_title = title[:found.start()].count(",")
+                        return str(authors_list_count + commas_in_title + 1)
+
+        # fallback (hidden behind "...")
+        if authors and "..." in authors:
+            return f"{authors_list_count}+"
+
+        return "-"
+
+    def roles_and_coauthors(self, authors_values):
+        """
+        Role of the researcher on each paper and the set of co-author names, in one pass
+        (each authors string is split once). Missing values get "Unknown".
+        """
+        roles = []
+        coauthors = set()
+
+        for authors_str in authors_values:
+            if not authors_str:
+                roles.append("Unknown")
+                continue
+
+            names = [n.strip() for n in str(authors_str).split(",")]
+            parts_raw = [n.lower() for n in names]
+
+            # co-author network (NaN authors are skipped, not treated as a name)
+            if authors_str == authors_str:
+                for name, lowered in zip(names, parts_raw):
+                    if "..." not in name and len(name) > 1 and not self.is_self(lowered):
+                        coauthors.add(name)
+
+            has_ellipsis = any("..." in p for p in parts_raw)
+            is_self = [self.is_self(p) for p in parts_raw if "..." not in p]
+
+            if not is_self:
+                roles.append("Unknown")
+            elif len(is_self) == 1:
+                roles.append("Solo Author" if is_self[0] else "Unknown")
+            elif is_self[0]:
+                roles.append("First Author")
+            elif not has_ellipsis and is_self[-1]:
+                roles.append("Last Author")
+            elif any(is_self[1:]):
+                roles.append("Co-Author")
+            elif has_ellipsis:
+                roles.append("Ambiguous")
+            else:
+                roles.append("Unknown")
+
+        return roles, coauthors
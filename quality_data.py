@@ -0,0 +1,221 @@
+import os
+import glob
+import json
+import time
+import threading
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+
+from database import engine, get_quality_version
+from venue_matcher import VenueMatcher, TitleIndex, normalize_text
+
+# how often (seconds) a worker asks the DB whether another worker uploaded a new list
+VERSION_CHECK_SECONDS = float(os.getenv("QUALITY_VERSION_CHECK_SECONDS", "30"))
+
+# where the prebuilt quality index artifact lives (see save_artifact)
+QUALITY_INDEX_DIR = os.getenv("QUALITY_INDEX_DIR", "quality_index")
+ARTIFACT_FORMAT = 1
+
+@dataclass(frozen=True)
+class QualitySnapshot:
+    """ Immutable matcher for one quality list version. """
+    version: int
+    matcher: VenueMatcher
+    loaded_at: float
+    source: str  # "db" or "artifact"
+
+def load_quality_data():
+    """ Fetches the faculty quality data (and the version it belongs to) from Supabase. """
+    with engine.begin() as conn:
+        version = get_quality_version(conn)
+        journals = pd.read_sql("SELECT * FROM journals_quality", conn)
+        conferences = pd.read_sql("SELECT * FROM conferences_quality", conn)
+
+    journals["Title"] = journals["Title"].astype(str)
+    conferences["Title"] = conferences["Title"].astype(str)
+
+    journals["Title_norm"] = journals["Title"].apply(normalize_text)
+    conferences["Title_norm"] = conferences["Title"].apply(normalize_text)
+
+    return journals, conferences, version
+
+def build_snapshot() -> QualitySnapshot:
+    journals, conferences, version = load_quality_data()
+    return QualitySnapshot(
+        version=version,
+        matcher=VenueMatcher.from_frames(journals, conferences),
+        loaded_at=time.time(),
+        source="db"
+    )
+
+# --- QUALITY INDEX ARTIFACT ---
+# <dir>/current.json                  -> {"version": N}
+# <dir>/vN.json                       -> titles, normalized titles, ranks, acronyms, vocab
+# <dir>/vN.<table>.offsets|rows.npy   -> token index (CSR), memory-mapped on load
+
+def _atomic_write(path, write):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        write(f)
+    os.replace(tmp, path)
+
+def save_artifact(snapshot: QualitySnapshot, directory: str = QUALITY_INDEX_DIR):
+    os.makedirs(directory, exist_ok=True)
+    prefix = os.path.join(directory, f"v{snapshot.version}")
+
+    meta = {"format": ARTIFACT_FORMAT, "version": snapshot.version, "tables": {}}
+    for name, index in (("journals", snapshot.matcher.journals), ("conferences", snapshot.matcher.conferences)):
+        _atomic_write(f"{prefix}.{name}.offsets.npy", lambda f: np.save(f, np.asarray(index.offsets)))
+        _atomic_write(f"{prefix}.{name}.rows.npy", lambda f: np.save(f, np.asarray(index.rows)))
+        meta["tables"][name] = {
+            "kind": index.kind,
+            "titles": index.titles,
+            "norms": index.norms,
+            "ranks": index.ranks,
+            "acronyms": index.acronyms,
+            "vocab": list(index.vocab)
+        }
+
+    _atomic_write(f"{prefix}.json", lambda f: f.write(json.dumps(meta).encode("utf-8")))
+    # flip the pointer last so readers never see a half-written version
+    _atomic_write(os.path.join(directory, "current.json"), lambda f: f.write(json.dumps({"version": snapshot.version}).encode("utf-8")))
+
+    for path in glob.glob(os.path.join(directory, "v*")):
+        if not os.path.basename(path).startswith(f"v{snapshot.version}."):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+def load_artifact(directory: str = QUALITY_INDEX_DIR):
+    """
+    Loads the prebuilt index (token index memory-mapped), or None if there is none.
+    Another worker's save_artifact may delete this version's files mid-load; that also
+    gives None (the caller builds from the DB). Once mapped, the files can go away.
+    """
+    try:
+        with open(os.path.join(directory, "current.json")) as f:
+            version = json.load(f)["version"]
+        prefix = os.path.join(directory, f"v{version}")
+        with open(f"{prefix}.json") as f:
+            meta = json.load(f)
+
+        if meta.get("format") != ARTIFACT_FORMAT:
+            return None
+
+        indexes = {}
+        for name, table in meta["tables"].items():
+            indexes[name] = TitleIndex(
+                table["kind"],
+                table["titles"],
+                table["norms"],
+                table["ranks"],
+                table["acronyms"],
+                {token: i for i, token in enumerate(table["vocab"])},
+                np.load(f"{prefix}.{name}.offsets.npy", mmap_mode="r"),
+                np.load(f"{prefix}.{name}.rows.npy", mmap_mode="r")
+            )
+    except (OSError, ValueError, KeyError):
+        return None
+
+    return QualitySnapshot(
+        version=meta["version"],
+        matcher=VenueMatcher(indexes["journals"], indexes["conferences"]),
+        loaded_at=time.time(),
+        source="artifact"
+    )
+
+def save_artifact_quietly(snapshot: QualitySnapshot):
+    try:
+        save_artifact(snapshot)
+    except Exception as e:
+        print(f"Warning: Could not write quality index artifact: {e}")
+
+def load_initial_snapshot() -> QualitySnapshot:
+    """ Prebuilt artifact if it matches the DB version, otherwise build from the DB (and save it). """
+    snapshot = load_artifact()
+    if snapshot is not None:
+        try:
+            db_version = get_quality_version()
+        except Exception as e:
+            print(f"Warning: Could not check quality list version: {e}")
+            db_version = snapshot.version
+        if db_version == snapshot.version:
+            return snapshot
+        print(f"Quality index artifact is stale (v{snapshot.version}, DB has v{db_version}).")
+
+    snapshot = build_snapshot()
+    save_artifact_quietly(snapshot)
+    return snapshot
+
+# --- CURRENT SNAPSHOT ---
+# readers only ever take a reference to _snapshot; a rebuild swaps the reference in one
+# assignment, so in-flight analyses keep the snapshot they started with.
+_snapshot = None
+_lock = threading.Lock()
+_rebuilding = False
+_rebuild_again = False  # refresh requested while a rebuild was running
+_last_version_check = 0.0
+
+def _swap(snapshot: QualitySnapshot):
+    global _snapshot
+    with _lock:
+        if _snapshot is None or snapshot.version >= _snapshot.version:
+            _snapshot = snapshot
+
+def get_snapshot() -> QualitySnapshot:
+    """
+    Returns the current snapshot (loaded lazily on first use). At most every
+    VERSION_CHECK_SECONDS the DB version is checked; a bump starts a background rebuild
+    and the old snapshot keeps serving until the new one is swapped in.
+    """
+    global _snapshot, _last_version_check
+    snapshot = _snapshot
+    if snapshot is None:
+        with _lock:
+            if _snapshot is None:
+                print("Loading Quality Data...")
+                _snapshot = load_initial_snapshot()
+            return _snapshot
+
+    now = time.monotonic()
+    if now - _last_version_check >= VERSION_CHECK_SECONDS:
+        _last_version_check = now
+        try:
+            if get_quality_version() > snapshot.version:
+                refresh_in_background()
+        except Exception as e:
+            print(f"Warning: Could not check quality list version: {e}")
+
+    return snapshot
+
+def refresh_in_background():
+    """
+    Rebuilds the snapshot on a daemon thread. If a rebuild is already running it is
+    marked dirty instead, and runs once more when done (that one reads the newer list).
+    """
+    global _rebuilding, _rebuild_again
+    with _lock:
+        if _rebuilding:
+            _rebuild_again = True
+            return
+        _rebuilding = True
+
+    def rebuild():
+        global _rebuilding, _rebuild_again
+        while True:
+            try:
+                snapshot = build_snapshot()
+                _swap(snapshot)
+                save_artifact_quietly(snapshot)
+                print(f"Quality data reloaded (version {snapshot.version}).")
+            except Exception as e:
+                print(f"Warning: Could not reload quality data: {e}")
+            with _lock:
+                if not _rebuild_again:
+                    _rebuilding = False
+                    return
+                _rebuild_again = False
+
+    threading.Thread(target=rebuild, name="quality-data-reload", daemon=True).start()
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import orjson
+from datetime import date, datetime
+from cachetools import LRUCache
+from fastapi.responses import Response
+import threading
+
+def frame_to_records(df: pd.DataFrame):
+    """ DataFrame -> list of dicts with NaN/Inf turned into None column-wise (no per-value walk). """
+    missing = df.isna() | df.isin([np.inf, -np.inf])
+    return df.astype(object).where(~missing, None).to_dict(orient="records")
+
+def _default(value):
+    # orjson handles str/int/float/dict/list/datetime/numpy natively; this covers the rest
+    if isinstance(value, (pd.Timestamp, datetime, date)):
+        return value.isoformat()
+    if value is pd.NA or value is pd.NaT:
+        return None
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    return str(value)
+
+def dumps(value) -> bytes:
+    """ Fast JSON encoding; numpy scalars/arrays are encoded directly and NaN/Inf become null. """
+    return orjson.dumps(value, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+class FastJSONResponse(Response):
+    """
+    JSON response encoded with orjson. Return it directly from an endpoint to skip
+    FastAPI's jsonable_encoder pass; bytes content is sent as-is (already encoded).
+    """
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+class EncodedCache:
+    """ Thread-safe LRU of encoded response bodies, bounded by total size in bytes. """
+
+    def __init__(self, max_bytes: int):
+        self.cache = LRUCache(maxsize=max_bytes, getsizeof=len)
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            return self.cache.get(key)
+
+    def put(self, key, body: bytes):
+        if len(body) > self.cache.maxsize:
+            return
+        with self.lock:
+            self.cache[key] = body
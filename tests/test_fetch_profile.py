@@ -0,0 +1,102 @@
+import httpx
+import pytest
+
+import fake_serpapi
+from fetchProfile import SerpApiClient, get_scholar_profile, get_scholar_profile_incremental, SERPAPI_MAX_RETRY_AFTER
+
+AUTHOR_ID = "test-750"  # fake_serpapi: 750 papers, 8 pages
+
+@pytest.fixture
+def fake_server():
+    servers = []
+
+    def start(**options):
+        server = fake_serpapi.serve(port=0, **options)
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+def fetch(base_url, parallelism, author_id=AUTHOR_ID):
+    serp_client = SerpApiClient("test-key", base_url=base_url, retries=8, backoff=0.01)
+    try:
+        return get_scholar_profile(author_id, serp_client=serp_client, parallelism=parallelism)
+    finally:
+        serp_client.close()
+
+@pytest.mark.parametrize("options", [
+    {"inexact": True},
+    {"failure_rate": 0.2},
+    {"rate_limit": 0.2, "retry_after": 0.01},
+], ids=["inexact-total", "failures", "rate-limited"])
+def test_parallel_fetch_matches_sequential(fake_server, options):
+    base_url = fake_server(**options)
+
+    sequential = fetch(base_url, parallelism=1)
+    parallel = fetch(base_url, parallelism=4)
+
+    assert len(sequential["publications"]) == 750
+    assert parallel == sequential
+
+def test_overestimated_total_stops_at_last_page(fake_server):
+    # 250 papers (3 pages) reported as 2250 (23 pages)
+    base_url = fake_server(total_offset=2000)
+
+    profile = fetch(base_url, parallelism=4, author_id="test-250")
+
+    assert len(profile["publications"]) == 250
+    # first page + pages 2-3, plus at most parallelism - 1 requests past the end
+    assert fake_serpapi.Handler.request_count <= 3 + 3
+
+def test_retry_after_is_honored():
+    serp_client = SerpApiClient("test-key", backoff=0.5)
+    try:
+        assert serp_client.retry_delay(0, httpx.Response(429, headers={"Retry-After": "7"})) == 7.0
+        assert serp_client.retry_delay(0, httpx.Response(429, headers={"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})) == 0.0
+        assert serp_client.retry_delay(0, httpx.Response(429, headers={"Retry-After": "86400"})) == SERPAPI_MAX_RETRY_AFTER
+        # no (usable) header: jittered exponential backoff
+        assert 0.5 <= serp_client.retry_delay(0, httpx.Response(503)) <= 0.75
+        assert 1.0 <= serp_client.retry_delay(1, httpx.Response(429, headers={"Retry-After": "soon"})) <= 1.5
+    finally:
+        serp_client.close()
+
+def test_incremental_stops_at_first_known_page(fake_server):
+    base_url = fake_server()
+    known = {p["title"]: p["citations"] for p in fetch(base_url, parallelism=4)["publications"]}
+    newest = [a["title"] for a in fake_serpapi.make_articles(AUTHOR_ID, 750)]
+
+    serp_client = SerpApiClient("test-key", base_url=base_url)
+    try:
+        # nothing new: one page
+        fake_serpapi.Handler.request_count = 0
+        profile = get_scholar_profile_incremental(AUTHOR_ID, known, serp_client=serp_client)
+        assert profile["caught_up"] and fake_serpapi.Handler.request_count == 1
+
+        # citation changes don't keep it reading, the counts of the page read come back
+        changed = {t: c + 1 for t, c in known.items()}
+        fake_serpapi.Handler.request_count = 0
+        profile = get_scholar_profile_incremental(AUTHOR_ID, changed, serp_client=serp_client)
+        assert profile["caught_up"] and fake_serpapi.Handler.request_count == 1
+        assert all(p["citations"] == known[p["title"]] for p in profile["publications"])
+
+        # a page mixing new and stored papers is the last one
+        fake_serpapi.Handler.request_count = 0
+        profile = get_scholar_profile_incremental(AUTHOR_ID, set(known) - set(newest[:150]), serp_client=serp_client)
+        assert profile["caught_up"] and fake_serpapi.Handler.request_count == 2
+        assert {p["title"] for p in profile["publications"]} >= set(newest[:150])
+
+        # new papers filling the first two pages: stops after the third
+        stale = {t: c for t, c in known.items() if t not in newest[:200]}
+        fake_serpapi.Handler.request_count = 0
+        profile = get_scholar_profile_incremental(AUTHOR_ID, stale, serp_client=serp_client)
+        assert profile["caught_up"] and fake_serpapi.Handler.request_count == 3
+        assert {p["title"] for p in profile["publications"]} >= set(newest[:200])
+
+        # more changes than max_pages covers: not caught up, but the pages read are returned
+        profile = get_scholar_profile_incremental(AUTHOR_ID, {}, max_pages=2, serp_client=serp_client)
+        assert not profile["caught_up"] and len(profile["publications"]) == 200
+    finally:
+        serp_client.close()
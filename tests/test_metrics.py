@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+from metrics import author_metrics, author_metrics_batch
+
+SINCE = 2020
+
+def baseline_metrics(df):
+    """ The per-author formulas evaluate_author_data_headless used before metrics.py. """
+    citations = sorted(df["citations"].tolist(), reverse=True)
+    h_index = sum(x >= i + 1 for i, x in enumerate(citations))
+    i10_index = sum(x >= 10 for x in citations)
+
+    g_index = 0
+    for i in range(len(citations)):
+        if sum(citations[:i+1]) >= (i+1)**2:
+            g_index = i + 1
+
+    recent_df = df[df["year"] >= SINCE]
+    return {
+        "h_index": h_index,
+        "g_index": g_index,
+        "i10_index": i10_index,
+        "total_c": int(df["citations"].sum()),
+        "max_c": df["citations"].max() if len(df) > 0 else 0,
+        "recent_p": len(recent_df),
+        "recent_c": int(recent_df["citations"].sum()),
+    }
+
+def random_author(rng):
+    n = int(rng.choice([0, 1, 2, rng.integers(3, 40), rng.integers(40, 400)]))
+    citations = [int(c) for c in rng.pareto(1.1, n) * 5]
+    years = [int(y) for y in rng.integers(1990, 2026, n)]
+    # what Scholar hands us now and then
+    for i in rng.choice(n, n // 10, replace=False) if n else []:
+        citations[i] = rng.choice([None, "", "n/a", "12"])
+    for i in rng.choice(n, n // 8, replace=False) if n else []:
+        years[i] = rng.choice([None, "", "forthcoming", "2023"])
+    # prepared the way publications_frame prepares them
+    df = pd.DataFrame({"citations": citations, "year": years}, dtype=object)
+    df["year"] = pd.to_numeric(df["year"], errors="coerce")
+    df["citations"] = pd.to_numeric(df["citations"], errors="coerce").fillna(0).astype(int)
+    return df
+
+def test_metrics_match_baseline():
+    rng = np.random.default_rng(7)
+    frames = [random_author(rng) for _ in range(300)]
+    batch = author_metrics_batch(
+        [df["citations"].to_numpy() for df in frames], [df["year"].to_numpy() for df in frames], since=SINCE
+    )
+    for df, stats in zip(frames, batch):
+        expected = baseline_metrics(df)
+        assert author_metrics(df["citations"].to_numpy(), df["year"].to_numpy(), since=SINCE) == expected
+        assert stats == expected
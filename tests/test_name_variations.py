@@ -0,0 +1,21 @@
+import pytest
+
+from name_variations import AuthorMatcher
+
+def test_roles_agree_with_author_pos():
+    matcher = AuthorMatcher.from_name("Wei Li")
+    papers = ["A Oliver, W Li", "W Lim, B Olivia", "W Li", "Y Lim, W Li, Z Q", "W Li, X Y, ...", "X Y, Z Q, ..."]
+    roles, coauthors = matcher.roles_and_coauthors(papers)
+
+    assert [matcher.author_pos(p, "") for p in papers] == ["2", "-", "1", "2", "1", "2+"]
+    assert roles == ["Last Author", "Unknown", "Solo Author", "Co-Author", "First Author", "Ambiguous"]
+    # names containing the last name, or a variant as a prefix, are other people
+    assert coauthors == {"A Oliver", "W Lim", "B Olivia", "Y Lim", "Z Q", "X Y"}
+
+def test_author_pos_in_title():
+    matcher = AuthorMatcher.from_name("Wei Li")
+    assert matcher.author_pos("", "W Lim, A B, W Li") == "3"
+
+def test_empty_name_is_rejected():
+    with pytest.raises(ValueError):
+        AuthorMatcher.from_name("  ")
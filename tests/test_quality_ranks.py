@@ -0,0 +1,58 @@
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+# database creates its engine on import; nothing here connects
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/unused")
+from database import resolve_latest_rank
+
+def get_latest_rank_dynamic(row):
+    """ The per-row rank lookup update_quality_list_in_db used before resolve_latest_rank. """
+    valid_cols = [c for c in row.index if pd.notna(row[c]) and str(row[c]).strip() not in ["", "-", "nan", "None", "0", "0.0", "N/A", "Unranked"]]
+    candidates = []
+
+    for col in valid_cols:
+        c_lower = col.lower()
+        bad_keywords = ["code", "id", "link", "url", "h5", "index", "metric", "comment", "issn", "isbn", "name", "title", "acronym", "citescore",
+                        "sjr", "snip", "categories", "publisher", "type", "open access"]
+        if any(bad in c_lower for bad in bad_keywords):
+            continue
+
+        if any(k in c_lower for k in ["core", "icore", "era", "rank", "quartile"]):
+            years = re.findall(r'\d{4}', col)
+            year = int(years[0]) if years else 0
+
+            if "quartile" in c_lower: bonus = 200
+            elif "core" in c_lower or "icore" in c_lower: bonus = 100
+            else: bonus = 0
+
+            candidates.append((year + bonus, col, row[col]))
+
+    candidates.sort(key=lambda x: x[0], reverse=True)
+    if candidates:
+        return str(candidates[0][2]).strip()
+    return "Unknown"
+
+COLUMNS = [
+    "Title", "Acronym", "Source", "ERA2010 Rank", "CORE2021", "Rank", "ICORE2023", "Quartile 2022",
+    "CORE2023 comment", "h5-index", "Sourceid", "Primary FoR", "ERA Rank 2023", "Core rank",
+]
+VALUES = ["A*", "A", "B", "C", "Q1", " Q2 ", "Australasian B", "-", "", None, np.nan, "0", 0, "0.0", 1, 2.5,
+          "N/A", "Unranked", "nan", "None", "  "]
+
+def test_resolve_latest_rank_matches_per_row_lookup():
+    rng = np.random.default_rng(3)
+    for trial in range(20):
+        # a random subset of the headers in a random order, so priority ties and
+        # column order both matter
+        columns = ["Title"] + list(rng.permutation(COLUMNS[1:])[:rng.integers(1, len(COLUMNS))])
+        n = 500
+        df = pd.DataFrame({col: [VALUES[i] for i in rng.integers(0, len(VALUES), n)] for col in columns})
+        df["Title"] = [f"Venue {i}" for i in range(n)]
+        # sparse sheets: most rows leave most rank columns empty
+        df = df.mask(rng.random(df.shape) < 0.5 * (trial % 2))
+
+        expected = df.apply(get_latest_rank_dynamic, axis=1)
+        pd.testing.assert_series_equal(resolve_latest_rank(df, "Unknown"), expected, check_names=False)
@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from venue_matcher import TitleIndex, VenueMatcher, normalize_text, venue_key, extract_acronyms, ACRONYM_ONLY_SCORE
+
+JOURNALS = [
+    ("Proceedings of the National Academy of Sciences", "Q1"),
+    ("Proceedings of the IEEE", "Q1"),
+    ("Proceedings of the VLDB Endowment", "Q1"),
+    ("Frontiers in Artificial Intelligence", "Q2"),
+    ("Journal of Machine Learning Research", "Q1"),
+]
+CONFERENCES = [
+    ("Australasian Joint Conference on Artificial Intelligence", "ai", "B"),
+    ("Conference on Human Computer Interaction", "hci", "C"),
+    ("International Conference on Internet of Things", "iot", "C"),
+    ("International Conference on Machine Learning", "icml", "A*"),
+    ("Conference on Human Factors in Computing Systems", "chi", "A*"),
+    ("Knowledge Discovery and Data Mining", "sigkdd", "A*"),
+]
+
+@pytest.fixture(scope="module")
+def matcher():
+    journals = pd.DataFrame({
+        "Title": [t for t, _ in JOURNALS],
+        "Title_norm": [normalize_text(t) for t, _ in JOURNALS],
+        "rank": [r for _, r in JOURNALS],
+    })
+    conferences = pd.DataFrame({
+        "Title": [t for t, _, _ in CONFERENCES],
+        "Title_norm": [normalize_text(t) for t, _, _ in CONFERENCES],
+        "acronym": [a for _, a, _ in CONFERENCES],
+        "rank": [r for _, _, r in CONFERENCES],
+    })
+    return VenueMatcher.from_frames(journals, conferences)
+
+@pytest.mark.parametrize("venue", [
+    "Proceedings of the National Academy of Sciences",
+    "Proceedings of the IEEE",
+    "Proceedings of the VLDB Endowment",
+])
+def test_conference_looking_journals_match_exactly(matcher, venue):
+    # "proceedings" makes guesser() confident it is a conference; the exact lookup still
+    # has to search the journal table
+    assert matcher.match(venue) == ("Journal", venue, "Q1", 100.0, "DB (Exact)")
+
+@pytest.mark.parametrize("venue", [
+    "Workshop on Trustworthy AI",
+    "Workshop on HCI for Social Good",
+    "IoT Workshop on Edge Security",
+    "Frontiers in AI",
+])
+def test_topic_words_are_not_acronym_hits(matcher, venue):
+    assert matcher.match(venue)[4] != "DB (Acronym)"
+
+@pytest.mark.parametrize("venue, title, score", [
+    ("Proceedings of the 2021 CHI Conference on Human Factors in Computing Systems",
+     "Conference on Human Factors in Computing Systems", 100.0),
+    ("Proceedings of the 27th ACM SIGKDD Conference on Knowledge Discovery & Data Mining",
+     "Knowledge Discovery and Data Mining", 100.0),
+    # nothing but the acronym backs these: still a hit, below an exact one
+    ("Proceedings of ICML 2021", "International Conference on Machine Learning", ACRONYM_ONLY_SCORE),
+    ("Advances in Neural Networks (ICML)", "International Conference on Machine Learning", ACRONYM_ONLY_SCORE),
+])
+def test_acronym_hits(matcher, venue, title, score):
+    assert matcher.match(venue) == ("Conference", title, "A*", score, "DB (Acronym)")
+
+def test_acronym_positions():
+    assert extract_acronyms("Proceedings of ICML 2021") == ["icml"]
+    assert extract_acronyms("Advances in Neural Information Processing Systems (NeurIPS)") == ["neurips"]
+    assert extract_acronyms("ICSE") == ["icse"]
+    assert extract_acronyms("NeurIPS '21") == ["neurips"]
+    assert extract_acronyms("Workshop on Trustworthy AI") == []
+    assert extract_acronyms("IEEE Transactions on Pattern Analysis") == []
+
+def test_match_many_agrees_with_match(matcher):
+    venues = [t for t, _ in JOURNALS] + [
+        "Workshop on Trustworthy AI", "Proceedings of ICML 2021", "Journal of Machine Learning Res.",
+        "Proceedings of the 2021 CHI Conference on Human Factors in Computing Systems", "", "Nature",
+    ]
+    batch = matcher.match_many(venues)
+    for venue in dict.fromkeys(venues):
+        assert tuple(batch.loc[venue]) == matcher.match(venue)
+
+@pytest.mark.parametrize("venue, key", [
+    ("Nature 521 (7553), 436-444", "Nature"),
+    ("Nature, 2015", "Nature"),
+    ("NeurIPS '21", "NeurIPS"),
+    ("Advances in neural information processing systems 33, 1877-1901",
+     "Advances in neural information processing systems"),
+    # ordinals, article numbers and identifiers have letters: kept, like case and punctuation
+    ("Proceedings of the 27th ACM SIGKDD", "Proceedings of the 27th ACM SIGKDD"),
+    ("PLoS ONE 10 (3), e0120", "PLoS ONE e0120"),
+    ("arXiv preprint arXiv:2101.00001", "arXiv preprint arXiv:2101.00001"),
+])
+def test_venue_key(venue, key):
+    assert venue_key(venue) == key
+
+def baseline_exact_or_token_match(df, venue_norm):
+    """ Stage 1 as it was before the token index: the first row with an equal or >= 70% overlapping title. """
+    venue_tokens = set(venue_norm.split())
+    for pos, title_norm in enumerate(df["Title_norm"]):
+        title_norm = str(title_norm).strip()
+        if not title_norm:
+            continue
+        if venue_norm == title_norm:
+            return pos, 1.0
+        title_tokens = set(title_norm.split())
+        overlap = len(venue_tokens & title_tokens) / max(len(venue_tokens), len(title_tokens))
+        if overlap >= 0.70:
+            return pos, overlap
+    return None
+
+def test_token_index_matches_linear_scan():
+    rng = np.random.default_rng(1)
+    words = [f"w{i}" for i in range(40)]
+    # few distinct words and short titles, so most venues have several overlapping titles
+    norms = [" ".join(rng.choice(words, rng.integers(1, 7), replace=False)) for _ in range(400)] + [""]
+    df = pd.DataFrame({"Title": norms, "Title_norm": norms, "rank": "A"})
+    index = TitleIndex.from_frame(df, "Journal")
+
+    venues = [" ".join(rng.choice(words, rng.integers(1, 7), replace=False)) for _ in range(1000)]
+    venues += norms[:50]
+    hits = 0
+    for venue_norm in venues:
+        venue_tokens = set(venue_norm.split())
+        n_tokens = len(venue_tokens)
+        min_shared = next(k for k in range(1, n_tokens + 1) if k / n_tokens >= 0.70)
+        expected = baseline_exact_or_token_match(df, venue_norm)
+        assert index.token_match(venue_tokens, min_shared) == expected
+        assert index.exact.get(venue_norm) == next((pos for pos, t in enumerate(norms) if t and t == venue_norm), None)
+        hits += expected is not None
+    assert hits > 100
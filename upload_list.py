@@ -2,7 +2,8 @@ import pandas as pd
 import re
 import string
 import numpy as np
-from database import engine, init_db
+from database import engine, init_db, bump_quality_version, resolve_latest_rank, replace_quality_table, conferences_quality, journals_quality
+from quality_data import build_snapshot, save_artifact
 
 def normalize_text(s):
     if not isinstance(s, str): return ""
@@ -27,40 +28,6 @@ def normalize_text(s):
     # 5. collapse spaces
     return re.sub(r"\s+", " ", s).strip()
 
-def get_latest_rank_dynamic(row):
-    valid_cols = [c for c in row.index if pd.notna(row[c]) and str(row[c]).strip() not in ["", "-", "nan", "None", "0", "0.0", "N/A", "Unranked"]]
-    candidates = []
-
-    for col in valid_cols:
-        c_lower = col.lower()
-        bad_keywords = ["code", "id", "link", "url", "h5", "index", "metric", "comment", "issn", "isbn", "name", "title", "acronym", "citescore",
-                        "sjr", "snip", "categories", "publisher", "type", "open access"]
-        if any(bad in c_lower for bad in bad_keywords):
-            continue
-
-        # look for rank columns
-        if any(k in c_lower for k in ["core", "icore", "era", "rank", "quartile"]):
-            # extract year (default to 0 if missing)
-            years = re.findall(r'\d{4}', col)
-            year = int(years[0]) if years else 0
-
-            # prefer CORE/ICORE over ERA if years are equal
-            if "quartile" in c_lower:
-                bonus = 200
-            elif "core" in c_lower or "icore" in c_lower:
-                bonus = 100
-            else:
-                bonus = 0
-
-            candidates.append((year + bonus, col, row[col]))
-
-    # sort by score
-    candidates.sort(key=lambda x: x[0], reverse=True)
-    
-    if candidates: 
-        return str(candidates[0][2]).strip()
-    return "N/A"
-
 def run_upload():
     init_db()
 
@@ -103,13 +70,14 @@ def run_upload():
             "Title": title_col,
             "Title_norm": title_col.apply(normalize_text),
             "acronym": acronym_col.str.lower(),
-            "rank": all_c.apply(get_latest_rank_dynamic, axis=1) 
+            "rank": resolve_latest_rank(all_c, "N/A") 
         })
 
         conf_db = conf_db[conf_db["Title_norm"] != ""]
 
         with engine.begin() as conn:
-            conf_db.to_sql("conferences_quality", conn, if_exists="replace", index=False)
+            replace_quality_table(conn, conferences_quality, conf_db)
+            bump_quality_version(conn)
         print(f"Successfully uploaded {len(conf_db)} Conferences!")
         
     except Exception as e:
@@ -125,18 +93,25 @@ def run_upload():
         jrnl_db = pd.DataFrame({
             "Title": jrnl["Title"],
             "Title_norm": jrnl["Title"].apply(normalize_text),
-            "rank": jrnl.apply(get_latest_rank_dynamic, axis=1),
+            "rank": resolve_latest_rank(jrnl, "N/A"),
             "issn": issn_col
         })
 
         jrnl_db = jrnl_db[jrnl_db["Title_norm"] != ""]
         
         with engine.begin() as conn:
-            jrnl_db.to_sql("journals_quality", conn, if_exists="replace", index=False)
+            replace_quality_table(conn, journals_quality, jrnl_db)
+            bump_quality_version(conn)
         print(f"Successfully uploaded {len(jrnl_db)} Journals!")
         
     except Exception as e:
         print(f"Error uploading Journals: {e}")
 
+    print("Writing quality index artifact...")
+    try:
+        save_artifact(build_snapshot())
+    except Exception as e:
+        print(f"Error writing quality index artifact: {e}")
+
 if __name__ == "__main__":
     run_upload()
@@ -0,0 +1,453 @@
+import re
+import string
+import threading
+import numpy as np
+import pandas as pd
+from cachetools import LRUCache
+from rapidfuzz import process, fuzz
+
+def normalize_text(s: str) -> str:
+    if not isinstance(s, str): return ""
+    s = s.lower()
+    s = s.replace('-', ' ')
+    s = re.sub(r'\b\d+(st|nd|rd|th)\b', '', s)
+    s = re.sub(r'\b\d+[-–]\d+\b', '', s)
+    s = re.sub(r'\b(pp|vol|no|issue)\.?\s*\d+', '', s)
+    s = re.sub(r'\b(19|20)\d{2}\b', '', s)
+    s = re.sub(r'\b\d+\b', '', s)
+    s = s.translate(str.maketrans("", "", string.punctuation))
+    return re.sub(r"\s+", " ", s).strip()
+
+# a token of digits and punctuation only: volume, issue, pages, year, '21
+NUMBER_TOKEN = re.compile(r"^[^\w]*\d[\d\W]*$")
+
+def venue_key(venue: str) -> str:
+    """
+    Cache key (and matcher input) for a venue: the raw string without its number-only
+    tokens, so "Nature 521 (7553), 436-444" and "Nature, 2015" share "Nature". Case and
+    punctuation stay, they can change the match; normalize_text drops the numbers anyway.
+    """
+    if not isinstance(venue, str): return venue
+    return " ".join(t for t in venue.split() if not NUMBER_TOKEN.match(t)).rstrip(",;: ")
+
+def clean_rank(val):
+    if pd.isna(val):
+        return "-"
+    s = str(val).strip()
+    return s if s and s.lower() not in {"nan", "none"} else "-"
+
+def guesser(venue: str) -> str:
+    """
+    Guess if the venue is a conference or journal based on keywords and strong acronyms.
+    If a venue has keywords that definetly only belong to conferences then we set the conference_certainty = TRUE
+        - Goal here is to avoid false matches due to high token overlap with the journals quality data
+    Input: venue string
+    Return: "conference", "journal", or "unknown" and boolean for conference quality
+    """
+    v = venue.lower()
+    conf_keywords = [
+        "conference", "conf.", "workshop", "symposium", "proceedings",
+        "meeting", "colloquium", "seminar", "summit", "annual"
+    ]
+    journ_keywords = [
+        "journal", "transactions", "trans.", "letters", "magazine",
+        "revue", "revista", "annals", "archives", "bulletin", "preprints", "print"
+    ]
+    conf_acronyms = [
+        "icml", "neurips", "nips", "aaai", "ijcai", "cvpr", "iccv", "eccv",
+        "kdd", "sdm", "aistats", "emnlp", "acl", "naacl", "eacl", "iclr",
+        "icra", "iros", "uai", "ecml", "pkdd"
+    ]
+    conference_certainty = False
+    if any(k in v for k in conf_keywords):
+        conference_certainty = True
+        return("Conference", conference_certainty)
+    if any(a in v for a in conf_acronyms):
+        return("Conference", conference_certainty)
+    if any(k in v for k in journ_keywords):
+        return("Journal", conference_certainty)
+    return("Unknown", conference_certainty)
+
+# columns of the batch result, in the same order as the match tuple
+MATCH_COLUMNS = ["type", "title", "rank", "score", "source"]
+
+# venues scored per cdist call (bounds the score matrix to chunk x titles)
+FUZZY_CHUNK_SIZE = 128
+
+# score of an acronym hit backed by nothing but the acronym itself
+ACRONYM_ONLY_SCORE = 90.0
+
+# publisher / series names that look like acronyms but never identify a venue
+NON_VENUE_ACRONYMS = {"ieee", "acm", "ifip", "siam", "lncs", "ceur", "ws", "proc", "usa", "uk"}
+
+# title words that say nothing about which venue an acronym hit is
+GENERIC_TITLE_TOKENS = {
+    "of", "on", "the", "and", "in", "for", "at", "to", "a", "an", "international", "conference",
+    "proceedings", "workshop", "symposium", "annual", "joint", "ieee", "acm"
+}
+
+# where a venue string names its acronym: "Proceedings of [the] [2021 | 27th] [ACM] X",
+# "X 2021" / "X '21", or the whole string ("ICSE")
+ACRONYM_AFTER_PROCEEDINGS = re.compile(
+    r"\bproc(?:eedings|\.)?\s+(?:of\s+)?(?:the\s+)?(?:(?:19|20)\d{2}\s+|\d+(?:st|nd|rd|th)\s+)?"
+    r"(?:(?:ACM|IEEE|IFIP|SIAM|USENIX)(?:/[A-Za-z]+)?\s+)?([A-Za-z][A-Za-z&]*)",
+    re.IGNORECASE
+)
+ACRONYM_BEFORE_YEAR = re.compile(r"\b([A-Za-z][A-Za-z&]*)\s*(?:'\d{2}|(?:19|20)\d{2})\b")
+
+def _looks_like_acronym(word: str) -> bool:
+    letters = [c for c in word if c.isalpha()]
+    upper = sum(c.isupper() for c in letters)
+    # mostly upper case with at least 2 capitals: ICML, NeurIPS, SIGKDD
+    return upper >= 2 and upper * 2 >= len(letters) and len(word) <= 12
+
+def extract_acronyms(venue: str):
+    """
+    Pulls acronym candidates out of a raw venue string, e.g.
+    "Proceedings of ICML 2021" -> ["icml"], "Advances in ... (NeurIPS)" -> ["neurips"].
+    Only words in the places a venue names its acronym are taken (brackets first, they
+    are the most reliable): an all-caps word elsewhere ("Workshop on Trustworthy AI")
+    is usually a topic, not the venue.
+    """
+    if not isinstance(venue, str):
+        return []
+
+    words = []
+    for group in re.findall(r"\(([^()]*)\)", venue):
+        words.extend(re.findall(r"[A-Za-z][A-Za-z&]*", group))
+    words.extend(ACRONYM_AFTER_PROCEEDINGS.findall(venue))
+    words.extend(ACRONYM_BEFORE_YEAR.findall(venue))
+    whole = re.findall(r"[A-Za-z][A-Za-z&]*", venue)
+    if len(whole) == 1:
+        words.extend(whole)
+
+    found = []
+    for word in words:
+        acronym = word.lower()
+        if _looks_like_acronym(word) and acronym not in NON_VENUE_ACRONYMS and acronym not in found:
+            found.append(acronym)
+    return found
+
+class TitleIndex:
+    """
+    Lookup structures for one quality table (journals or conferences), built once:
+      - exact:    Title_norm -> first row position
+      - tokens:   row position -> token set of its Title_norm (stage 1 overlap)
+      - acronyms: acronym -> first row position (conferences only)
+      - postings: token -> ascending row positions (inverted index for stage 1), stored
+                  CSR-style as vocab (token -> id) + offsets/rows arrays so they can be
+                  saved to / memory-mapped from a quality index artifact
+    """
+
+    def __init__(self, kind, titles, norms, ranks, acronyms, vocab, offsets, rows):
+        self.kind = kind
+        self.titles = titles
+        self.norms = norms
+        self.ranks = ranks
+        self.acronyms = acronyms
+        self.vocab = vocab
+        self.offsets = offsets
+        self.rows = rows
+
+        # built once per load (from a frame or an artifact), not per query
+        self.exact = {}
+        self.tokens = []
+        for pos, title_norm in enumerate(norms):
+            if title_norm:
+                self.exact.setdefault(title_norm, pos)
+            self.tokens.append(frozenset(title_norm.split()))
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, kind: str):
+        titles, norms, ranks, acronyms, postings = [], [], [], {}, {}
+
+        if df is not None and not df.empty and "Title_norm" in df.columns:
+            acronym_col = df["acronym"] if "acronym" in df.columns else pd.Series([None] * len(df))
+            rank_col = df["rank"] if "rank" in df.columns else pd.Series([None] * len(df))
+
+            for pos, (title_raw, title_norm, rank, acronym) in enumerate(zip(df["Title"], df["Title_norm"], rank_col, acronym_col)):
+                if pd.isna(title_raw) or pd.isna(title_norm):
+                    title_norm = ""
+                title_norm = str(title_norm).strip()
+
+                titles.append(str(title_raw))
+                norms.append(title_norm)
+                ranks.append(clean_rank(rank))
+
+                for token in set(title_norm.split()):
+                    postings.setdefault(token, []).append(pos)
+
+                if isinstance(acronym, str):
+                    acronym = acronym.strip().lower()
+                    if acronym and acronym not in {"nan", "none"}:
+                        acronyms.setdefault(acronym, pos)
+
+        vocab = {token: i for i, token in enumerate(postings)}
+        lengths = [len(p) for p in postings.values()]
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(lengths)
+        rows = np.fromiter((pos for p in postings.values() for pos in p), dtype=np.int32, count=int(offsets[-1]))
+        return cls(kind, titles, norms, ranks, acronyms, vocab, offsets, rows)
+
+    def posting(self, token_id):
+        return self.rows[self.offsets[token_id]:self.offsets[token_id + 1]]
+
+    def __len__(self):
+        return len(self.titles)
+
+    def result(self, pos, score, source):
+        return (self.kind, self.titles[pos], self.ranks[pos], score, source)
+
+    def token_match(self, venue_tokens: set, min_shared: int):
+        """
+        First row (in table order) with token overlap >= 70%.
+        A title can only reach 70% if it shares at least `min_shared` tokens with the
+        venue, so it must contain one of the (n - min_shared + 1) rarest venue tokens:
+        only those posting lists are read (prefix filtering).
+        """
+        n_tokens = len(venue_tokens)
+        token_ids = [self.vocab[t] for t in venue_tokens if t in self.vocab]
+        if len(token_ids) < min_shared:
+            return None
+
+        token_ids.sort(key=lambda i: self.offsets[i + 1] - self.offsets[i])
+        candidates = np.unique(np.concatenate([self.posting(i) for i in token_ids[:n_tokens - min_shared + 1]]))
+
+        # np.unique sorts, so candidates are walked in table order
+        for pos in candidates.tolist():
+            title_tokens = self.tokens[pos]
+            if not title_tokens:
+                continue
+            overlap = len(venue_tokens & title_tokens) / max(n_tokens, len(title_tokens))
+            if overlap >= 0.70:
+                return pos, overlap
+        return None
+
+    def best_fuzzy(self, venue: str):
+        if not self.titles:
+            return None
+        result = process.extractOne(venue, self.titles, scorer=fuzz.WRatio)
+        if not result:
+            return None
+        _, score, pos = result
+        return self.result(pos, float(score), "DB (Fuzzy)")
+
+    def best_fuzzy_many(self, venues: list):
+        """ best_fuzzy for many venues: one cdist call per chunk, spread over all cores. """
+        if not self.titles:
+            return [None] * len(venues)
+
+        results = []
+        for start in range(0, len(venues), FUZZY_CHUNK_SIZE):
+            chunk = venues[start:start + FUZZY_CHUNK_SIZE]
+            # float64 so scores (and the >= 90 cut-off) are identical to extractOne
+            scores = process.cdist(chunk, self.titles, scorer=fuzz.WRatio, dtype=np.float64, workers=-1)
+            # argmax returns the first best title, like extractOne
+            for i, pos in enumerate(scores.argmax(axis=1)):
+                results.append(self.result(int(pos), float(scores[i, pos]), "DB (Fuzzy)"))
+        return results
+
+class VenueMatcher:
+    """
+    Precompiled venue matcher built once from the journals / conferences quality tables.
+    Stages (first hit wins):
+      0) exact Title_norm hash lookup (both tables)
+      1) acronym lookup against conferences_quality.acronym (conference-looking venues;
+         scored ACRONYM_ONLY_SCORE and tried after stage 2 if the title shares no word)
+      2) token overlap >= 0.70 via the inverted index
+      3) fuzzy fallback, only if guesser() is not confident it's a conference
+    """
+
+    def __init__(self, journals: TitleIndex, conferences: TitleIndex):
+        self.journals = journals
+        self.conferences = conferences
+
+    @classmethod
+    def from_frames(cls, journals: pd.DataFrame, conferences: pd.DataFrame):
+        return cls(TitleIndex.from_frame(journals, "Journal"), TitleIndex.from_frame(conferences, "Conference"))
+
+    def search_order(self, hint, conference_confidence):
+        # hints are guesser()'s values: "Conference", "Journal" or "Unknown"
+        if hint == "Conference":
+            order = [self.conferences]
+            # only try journals too if not fully confident it's a conference
+            if not conference_confidence:
+                order.append(self.journals)
+            return order
+        if hint == "Journal":
+            return [self.journals, self.conferences]
+        return [self.conferences, self.journals]
+
+    def fuzzy_order(self, hint):
+        if hint == "Conference":
+            return [self.conferences]
+        if hint == "Journal":
+            return [self.journals]
+        return [self.conferences, self.journals]
+
+    def match_fast(self, venue: str):
+        """
+        Runs every stage except fuzzy.
+        Returns (result, hint, conference_confidence); result is None when only the
+        fuzzy stage is left to try.
+        """
+        # --- guards ---
+        if pd.isna(venue) or not isinstance(venue, str) or not venue.strip():
+            return ("Error", None, "-", 0.0, "Invalid venue"), None, True
+
+        venue_norm = normalize_text(venue)
+        if not venue_norm:
+            return ("Error", None, "-", 0.0, "Normalization failed"), None, True
+
+        venue_tokens = set(venue_norm.split())
+        if not venue_tokens:
+            return ("Error", None, "-", 0.0, "No tokens"), None, True
+
+        hint, conference_confidence = guesser(venue)
+        search_order = self.search_order(hint, conference_confidence)
+
+        # --- stage 0: exact normalized title, in both tables (the hint only sets the order):
+        # "Proceedings of the IEEE" looks like a conference but is listed as a journal ---
+        for index in self.search_order(hint, False):
+            pos = index.exact.get(venue_norm)
+            if pos is not None:
+                return index.result(pos, 100.0, "DB (Exact)"), hint, conference_confidence
+
+        # --- stage 1: acronym (e.g. "Proceedings of ICML 2021") ---
+        # only for venues that look like conferences: short capitalised words in other
+        # names ("Frontiers in AI", "JAMA Network Open") would hit the acronym table. A
+        # venue of unknown kind qualifies only if it is nothing but the acronym ("ICSE 2020").
+        if hint == "Conference":
+            acronyms = extract_acronyms(venue)
+        elif hint == "Unknown":
+            acronyms = [a for a in extract_acronyms(venue) if a == venue_norm]
+        else:
+            acronyms = []
+        # a hit whose title shares no real word with the venue is kept only as a last resort
+        weak_acronym_hit = None
+        for acronym in acronyms:
+            pos = self.conferences.acronyms.get(acronym)
+            if pos is None:
+                continue
+            if (venue_tokens & self.conferences.tokens[pos]) - GENERIC_TITLE_TOKENS - {acronym}:
+                return self.conferences.result(pos, 100.0, "DB (Acronym)"), hint, conference_confidence
+            if weak_acronym_hit is None:
+                weak_acronym_hit = self.conferences.result(pos, ACRONYM_ONLY_SCORE, "DB (Acronym)")
+
+        # --- stage 2: token overlap >= 0.70 ---
+        n_tokens = len(venue_tokens)
+        min_shared = next(k for k in range(1, n_tokens + 1) if k / n_tokens >= 0.70)
+        for index in search_order:
+            hit = index.token_match(venue_tokens, min_shared)
+            if hit:
+                pos, overlap = hit
+                return index.result(pos, round(overlap * 100, 2), "DB (Token≥70%)"), hint, conference_confidence
+
+        if weak_acronym_hit is not None:
+            return weak_acronym_hit, hint, conference_confidence
+        return None, hint, conference_confidence
+
+    def match(self, venue: str, is_cs_ai=False):
+        """
+        Returns:
+          (match_type, matched_title, rank, match_score, source)
+        """
+        res, hint, conference_confidence = self.match_fast(venue)
+        if res:
+            return res
+
+        # --- stage 3: fuzzy ONLY if conference_confidence is False ---
+        if conference_confidence is False:
+            candidates = [c for c in (index.best_fuzzy(venue) for index in self.fuzzy_order(hint)) if c]
+            if candidates:
+                best = max(candidates, key=lambda x: x[3])
+                if best[3] >= 90:
+                    return best
+
+        return (hint, None, "-", 0.0, "No match")
+
+    def match_many(self, venues, is_cs_ai=False, progress_callback=None):
+        """
+        Batch version of match(): gives the same result per venue.
+        progress_callback (optional) receives the fraction done (0..1).
+        Returns a DataFrame indexed by venue with MATCH_COLUMNS.
+        """
+        venues = list(dict.fromkeys(venues))
+        results = {}
+        pending = {}  # venues that still need the fuzzy stage -> hint
+
+        for venue in venues:
+            res, hint, conference_confidence = self.match_fast(venue)
+            if res:
+                results[venue] = res
+            elif conference_confidence is False:
+                pending[venue] = hint
+            else:
+                results[venue] = (hint, None, "-", 0.0, "No match")
+
+        if progress_callback:
+            progress_callback(0.5)
+
+        # --- fuzzy stage: one cdist per quality table for all pending venues ---
+        best = {}
+        for index in (self.conferences, self.journals):
+            queries = [v for v, hint in pending.items() if index in self.fuzzy_order(hint)]
+            if not queries:
+                continue
+            for venue, candidate in zip(queries, index.best_fuzzy_many(queries)):
+                # strict '>' keeps the conference hit on ties, like max() in match()
+                if candidate and (venue not in best or candidate[3] > best[venue][3]):
+                    best[venue] = candidate
+
+        for venue, hint in pending.items():
+            candidate = best.get(venue)
+            if candidate and candidate[3] >= 90:
+                results[venue] = candidate
+            else:
+                results[venue] = (hint, None, "-", 0.0, "No match")
+
+        if progress_callback:
+            progress_callback(1.0)
+
+        return pd.DataFrame([results[v] for v in venues], index=pd.Index(venues, dtype=object), columns=MATCH_COLUMNS)
+
+class MatchCache:
+    """
+    Bounded, thread-safe LRU cache of match results with hit/miss counters.
+    Keys are (venue_key(venue), is_cs_ai, quality_version): not the normalized form,
+    which does not decide the match on its own, and never an older quality list's result
+    once the version moves on.
+    """
+
+    def __init__(self, maxsize: int):
+        self.cache = LRUCache(maxsize=maxsize)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            try:
+                value = self.cache[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.cache[key] = value
+
+    def clear(self):
+        with self.lock:
+            self.cache.clear()
+
+    def stats(self):
+        with self.lock:
+            return {
+                "size": len(self.cache),
+                "maxsize": self.cache.maxsize,
+                "hits": self.hits,
+                "misses": self.misses
+            }